@@ -0,0 +1,207 @@
+# All required modules and initialisations.
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from license_data_generator import ValuePool, License, Corrupt, Validate, Stats
+
+# Corruption function for each column, in the order Corrupt.introduce_corruptions calls them.
+CORRUPTIONS = {
+    'First Name': Corrupt.introduce_name_corruption,
+    'Last Name': Corrupt.introduce_name_corruption,
+    'Date of Birth': Corrupt.introduce_date_corruption,
+    'Place of Birth': Corrupt.introduce_name_corruption,
+    'Gender': Corrupt.introduce_gender_corruption,
+    'Date of Issue': Corrupt.introduce_date_corruption,
+    'Date of Expiry': Corrupt.introduce_date_corruption,
+    'Issuing Authority': Corrupt.introduce_authority_corruption,
+    'License Number': Corrupt.introduce_drivernum_corruption,
+    'Address': Corrupt.introduce_address_corruption
+}
+
+# Validation function and the columns it depends on for each column, in the order Validate.validate calls them.
+VALIDATIONS = {
+    'First Name': (Validate.validate_name, ()),
+    'Last Name': (Validate.validate_name, ()),
+    'Date of Birth': (Validate.validate_birthdate, ()),
+    'Place of Birth': (Validate.validate_birthplace, ()),
+    'Gender': (Validate.validate_gender, ()),
+    'Date of Issue': (Validate.validate_issuedate, ('Date of Birth',)),
+    'Date of Expiry': (Validate.validate_expirydate, ('Date of Issue',)),
+    'Issuing Authority': (Validate.validate_authority, ()),
+    'License Number': (Validate.validate_drivernum, ('First Name', 'Last Name', 'Gender', 'Date of Birth')),
+    'Address': (Validate.validate_address, ())
+}
+
+# Modules whose import is timed in a fresh interpreter, and the most seconds an import may take before the benchmark fails.
+IMPORTS = ('license_data_generator', 'license_pipeline')
+IMPORT_BUDGET = 1.0
+
+class Benchmark:
+    """This is a class to measure how fast generation, corruption, validation and stats run, and how much memory they use, at different numbers of rows
+and corruption levels. Results are plain dictionaries that can be saved as JSON and compared with the results of an earlier commit."""
+    def __init__(self, sizes=(1000, 10000, 100000, 1000000), levels=(0.0, 0.1, 0.5), repeat=3, columns=True, memory=True, seed=0, imports=True,
+                 workers=(2, 4)):
+        """ Function to set up a benchmark. Every measurement is the fastest of repeat runs, columns also measures the function of each column,
+        and memory measures the peak memory of each step in one extra run with tracemalloc, which would otherwise slow the timed runs down.
+        imports also measures how long the modules in IMPORTS take to import, and workers lists the numbers of threads Validate.validate is also
+        measured with, to compare with validating one column after another."""
+        self.sizes = sizes
+        self.levels = levels
+        self.repeat = repeat
+        self.columns = columns
+        self.memory = memory
+        self.seed = seed
+        self.imports = imports
+        self.workers = workers
+        self.pool = ValuePool(size=10000, seed=seed)
+        self.results = []
+
+    def measure(self, stage, rows, level, function, *args):
+        """ Function to time a step and record its rows/sec and peak memory. Dataframes in args are shallow-copied for every run, so steps that add
+        columns or replace values always start from the same data. Returns the result of the last run."""
+        def run():
+            return function(*[arg.copy(deep=False) if isinstance(arg, pd.DataFrame) else arg for arg in args])
+
+        best = float('inf')
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            result = run()
+            best = min(best, time.perf_counter() - start)
+
+        peak = None
+        if self.memory:
+            tracemalloc.start()
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        self.results.append({'stage': stage, 'rows': rows, 'corruption_level': level, 'seconds': round(best, 6),
+                             'rows_per_second': round(rows / best, 1) if best else None,
+                             'peak_mb': round(peak / 2 ** 20, 3) if peak is not None else None})
+        return result
+
+    def measure_import(self, module):
+        """ Function to time importing a module in a fresh interpreter, which every new worker process or command line call pays before doing any work,
+        and record the fastest of repeat imports."""
+        code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+        directory = os.path.dirname(os.path.abspath(__file__))
+        best = min(float(subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True, cwd=directory).stdout)
+                   for _ in range(self.repeat))
+        self.results.append({'stage': f'import:{module}', 'rows': None, 'corruption_level': None, 'seconds': round(best, 6),
+                             'rows_per_second': None, 'peak_mb': None})
+
+    def run(self):
+        """ Function to run every step at every size and corruption level, and return the results."""
+        if self.imports:
+            for module in IMPORTS:
+                self.measure_import(module)
+        for rows in self.sizes:
+            rng = np.random.default_rng(self.seed)
+            df = self.measure('generate', rows, None, License.generate_batch, rows, rng, None, self.pool)
+            for level in self.levels:
+                corrupted = self.measure('corrupt', rows, level, Corrupt.introduce_corruptions, df, level, self.pool, np.random.default_rng(self.seed))
+                validated = self.measure('validate', rows, level, Validate.validate, corrupted)
+                for workers in self.workers:
+                    self.measure(f'validate:workers={workers}', rows, level, lambda df, workers=workers: Validate.validate(df, workers=workers), corrupted)
+                self.measure('stats', rows, level, Stats.summarise, validated)
+
+                if self.columns:
+                    for column, function in CORRUPTIONS.items():
+                        self.measure(f'corrupt:{column}', rows, level,
+                                     lambda df, function=function, column=column: function(df, column, level, np.random.default_rng(self.seed)), df)
+                    for column, (function, dependencies) in VALIDATIONS.items():
+                        self.measure(f'validate:{column}', rows, level,
+                                     lambda df, function=function, column=column, dependencies=dependencies: function(df, column, *dependencies), corrupted)
+        return self.results
+
+    def report(self):
+        """ Function to return the results together with details of the machine and commit they were measured on."""
+        try:
+            commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {'commit': commit, 'created': datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+                'machine': platform.machine(), 'processor': platform.processor(), 'repeat': self.repeat, 'results': self.results}
+
+    @staticmethod
+    def compare(baseline, current, threshold=0.2, min_seconds=0.01):
+        """ Function to compare two reports and return a list of the steps that regressed: steps whose rows/sec dropped, or whose peak memory grew,
+        by more than threshold. Steps that took under min_seconds in the baseline are too noisy to compare and are skipped."""
+        def key(result):
+            return result['stage'], result['rows'], result['corruption_level']
+
+        previous = {key(result): result for result in baseline['results']}
+        regressions = []
+        for result in current['results']:
+            before = previous.get(key(result))
+            if before is None or before['seconds'] < min_seconds:
+                continue
+            if result['rows_per_second'] is None:
+                # Imports have no rows, so their time is compared instead.
+                if result['seconds'] > before['seconds'] * (1 + threshold):
+                    regressions.append({**result, 'metric': 'seconds', 'baseline': before['seconds'], 'current': result['seconds']})
+            elif result['rows_per_second'] < before['rows_per_second'] * (1 - threshold):
+                regressions.append({**result, 'metric': 'rows_per_second', 'baseline': before['rows_per_second'], 'current': result['rows_per_second']})
+            if before['peak_mb'] and result['peak_mb'] and result['peak_mb'] > before['peak_mb'] * (1 + threshold):
+                regressions.append({**result, 'metric': 'peak_mb', 'baseline': before['peak_mb'], 'current': result['peak_mb']})
+        return regressions
+
+    @staticmethod
+    def over_budget(report, budget=IMPORT_BUDGET):
+        """ Function that returns the imports of a report that took longer than budget seconds."""
+        return [result for result in report['results'] if result['stage'].startswith('import:') and result['seconds'] > budget]
+
+def main(argv=None):
+    """ Function for the command line, which runs the benchmark, saves the results as JSON and exits with status 1 if any step regressed against a baseline."""
+    parser = argparse.ArgumentParser(description="Benchmark generation, corruption, validation and stats of license data.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000], help="numbers of rows to measure")
+    parser.add_argument('--levels', type=float, nargs='+', default=[0.0, 0.1, 0.5], help="corruption levels to measure")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per step, of which the fastest is kept")
+    parser.add_argument('--no-columns', action='store_true', help="skip the function of each column")
+    parser.add_argument('--no-memory', action='store_true', help="skip measuring peak memory")
+    parser.add_argument('--no-imports', action='store_true', help="skip measuring import times")
+    parser.add_argument('--import-budget', type=float, default=IMPORT_BUDGET, help="most seconds an import may take before the check fails")
+    parser.add_argument('--workers', type=int, nargs='*', default=[2, 4], help="numbers of threads to also measure validation with")
+    parser.add_argument('--output', help="file to save the results to")
+    parser.add_argument('--baseline', help="results of an earlier run to compare with")
+    parser.add_argument('--threshold', type=float, default=0.2, help="fraction a step may regress by before the check fails")
+    args = parser.parse_args(argv)
+
+    benchmark = Benchmark(args.sizes, args.levels, args.repeat, not args.no_columns, not args.no_memory, imports=not args.no_imports,
+                          workers=args.workers)
+    benchmark.run()
+    report = benchmark.report()
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=1)
+
+    for result in report['results']:
+        if result['rows'] is None:
+            print(f"{result['stage']:<44} {result['seconds']:>14.3f} s")
+            continue
+        print(f"{result['stage']:<28} {result['rows']:>9} {str(result['corruption_level']):>5} {result['rows_per_second'] or 0:>14,.0f} rows/s {result['peak_mb'] or 0:>10.1f} MB")
+
+    slow_imports = Benchmark.over_budget(report, args.import_budget)
+    for result in slow_imports:
+        print(f"Importing {result['stage'][len('import:'):]} took {result['seconds']:.3f} s, over the budget of {args.import_budget} s.", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            regressions = Benchmark.compare(json.load(file), report, args.threshold)
+        for regression in regressions:
+            print(f"Regression in {regression['stage']} at {regression['rows']} rows and level {regression['corruption_level']}: "
+                  f"{regression['metric']} went from {regression['baseline']} to {regression['current']}.", file=sys.stderr)
+        if regressions:
+            return 1
+    return 1 if slow_imports else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
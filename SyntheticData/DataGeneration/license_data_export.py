@@ -0,0 +1,310 @@
+# All required modules and initialisations.
+import json
+import os
+import queue
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+import pandas as pd
+from license_data_generator import License, Validate, Stats, StatsSummary
+
+# SQL that differs between the supported databases.
+DIALECTS = {
+    'mysql': {'placeholder': '%s', 'id_column': 'INT AUTO_INCREMENT PRIMARY KEY'},
+    'sqlite': {'placeholder': '?', 'id_column': 'INTEGER PRIMARY KEY AUTOINCREMENT'}
+}
+
+class ConnectionPool:
+    """This is a class to keep a fixed number of open database connections that are reused, instead of opening a new connection for every step."""
+    def __init__(self, connect, size=4):
+        """ Function to set up a pool of at most size connections, each opened by calling connect() the first time it is needed."""
+        self.connect = connect
+        self.size = size
+        self.opened = 0
+        self.idle = queue.LifoQueue()
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        """ Function to borrow a connection from the pool for the duration of a with block. If the block raises, whatever it left uncommitted
+        is rolled back and the connection is closed instead of being reused, so the next user can't commit it by accident."""
+        # Reuse an idle connection, open a new one if the pool isn't full, or otherwise wait for one to be returned.
+        try:
+            connection = self.idle.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                open_new = self.opened < self.size
+                if open_new:
+                    self.opened += 1
+            connection = None if open_new else self.idle.get()
+
+        # A new slot, or one whose connection was thrown away, is None and gets a new connection. If connecting fails the slot is put back
+        # as None, so it can be tried again and threads waiting for a connection aren't left waiting forever.
+        if connection is None:
+            try:
+                connection = self.connect()
+            except BaseException:
+                self.idle.put(None)
+                raise
+        try:
+            yield connection
+        except BaseException:
+            ConnectionPool.discard(connection)
+            self.idle.put(None)
+            raise
+        self.idle.put(connection)
+
+    @staticmethod
+    def discard(connection):
+        """ Function to roll back and close a connection that failed, ignoring any error from a connection that is already broken."""
+        for step in (connection.rollback, connection.close):
+            try:
+                step()
+            except Exception:
+                pass
+
+    def close(self):
+        """ Function to close every idle connection in the pool."""
+        while not self.idle.empty():
+            connection = self.idle.get_nowait()
+            if connection is not None:
+                connection.close()
+            self.opened -= 1
+
+class Exporter:
+    """This is a class to load license datasets into the license_data and dataset_registry tables of a database in batches. It works with any
+DB-API connection, such as mysql.connector for MySQL or sqlite3 for local testing."""
+    def __init__(self, connect, dialect='mysql', batch_size=10000, commit_every=100000, pool_size=4):
+        """ Function to set up an exporter. connect() must return a new DB-API connection, rows are inserted batch_size at a time
+        with executemany, and the transaction is committed after every commit_every rows."""
+        if dialect not in DIALECTS:
+            raise ValueError(f"Unknown dialect '{dialect}', expected one of {sorted(DIALECTS)}.")
+        self.dialect = dialect
+        self.batch_size = batch_size
+        self.commit_every = commit_every
+        self.pool = ConnectionPool(connect, pool_size)
+        self.schema_created = False
+
+    @staticmethod
+    def for_mysql(host="localhost", user="root", password="password", database="licensedatav2", **kwargs):
+        """ Function to return an exporter for a MySQL database, which is created if it doesn't already exist."""
+        import mysql.connector
+
+        # Create the database for license data if it doesn't already exist.
+        server = mysql.connector.connect(host=host, user=user, password=password)
+        server.cursor().execute(f"CREATE DATABASE IF NOT EXISTS {database}")
+        server.close()
+
+        return Exporter(lambda: mysql.connector.connect(host=host, user=user, password=password, database=database, allow_local_infile=True),
+                        dialect='mysql', **kwargs)
+
+    @staticmethod
+    def for_sqlite(path, **kwargs):
+        """ Function to return an exporter for a SQLite database file, for testing locally without a MySQL server."""
+        import sqlite3
+        return Exporter(lambda: sqlite3.connect(path, check_same_thread=False), dialect='sqlite', **kwargs)
+
+    @staticmethod
+    def license_columns():
+        """ Function to return the columns of the license_data table: every column of a validated dataset, plus the dataset it belongs to."""
+        # Generate an empty dataset just to extract the column names.
+        return list(Validate.validate(License.generate_dataset(0)).columns) + ['Dataset']
+
+    @staticmethod
+    def attributes():
+        """ Function to return the attributes of a license, in column order."""
+        return list(License.generate_dataset(0).columns)
+
+    def create_schema(self):
+        """ Function to create the dataset_registry and license_data tables if they don't already exist. This is only done once per exporter."""
+        if self.schema_created:
+            return
+        id_column = DIALECTS[self.dialect]['id_column']
+
+        # Note that dataset isn't the primary key of the registry, because it refers to multiple rows of license_data.
+        create_dataset_registry_query = f"""
+        CREATE TABLE IF NOT EXISTS dataset_registry (
+            dataset_id {id_column},
+            Dataset VARCHAR(255),
+            Total_Entries INT,
+            Corrupt_Fields INT,
+            Corruption_Percentage DECIMAL(5,2),
+            Creation_Time TIMESTAMP,
+            {", ".join(f"`{attribute} Corruption` INT" for attribute in Exporter.attributes())},
+            Metadata LONGTEXT
+        )
+        """
+
+        # Backticks around column names avoid conflicts with the spaces in them.
+        columns = ", ".join(f"`{column}` VARCHAR(255)" for column in Exporter.license_columns())
+        create_license_data_query = f"CREATE TABLE IF NOT EXISTS license_data (id {id_column}, {columns})"
+
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(create_dataset_registry_query)
+            cursor.execute(create_license_data_query)
+            connection.commit()
+        self.schema_created = True
+
+    @staticmethod
+    def rows(df):
+        """ Function to turn a dataframe into a list of tuples of plain Python values, with missing values as None."""
+        return list(df.astype(object).where(pd.notna(df), None).itertuples(index=False, name=None))
+
+    def insert_query(self, table, columns):
+        """ Function to build a parameterized INSERT query for the given table and columns."""
+        placeholders = ", ".join(DIALECTS[self.dialect]['placeholder'] for _ in columns)
+        return f"INSERT INTO {table} ({', '.join(f'`{column}`' for column in columns)}) VALUES ({placeholders})"
+
+    def load(self, df, dataset=None, method='executemany'):
+        """ Function to insert a dataframe into the license_data table, tagging every row with the dataset name if one is given.
+        The method is either 'executemany' for batched INSERTs, or 'load_data' to bulk load each batch from a CSV file with MySQL's LOAD DATA.
+        Returns the number of rows inserted."""
+        if method not in ('executemany', 'load_data'):
+            raise ValueError(f"Unknown method '{method}', expected 'executemany' or 'load_data'.")
+        if method == 'load_data' and self.dialect != 'mysql':
+            raise ValueError("LOAD DATA is only supported for MySQL.")
+        self.create_schema()
+        if dataset is not None:
+            df = df.assign(Dataset=dataset)
+
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            uncommitted = 0
+            for start in range(0, len(df), self.batch_size):
+                batch = df.iloc[start:start + self.batch_size]
+                if method == 'executemany':
+                    cursor.executemany(self.insert_query('license_data', list(batch.columns)), Exporter.rows(batch))
+                else:
+                    self.load_data(cursor, batch)
+
+                # Commit after every commit_every rows, and once more at the end.
+                uncommitted += len(batch)
+                if uncommitted >= self.commit_every:
+                    connection.commit()
+                    uncommitted = 0
+            connection.commit()
+        return len(df)
+
+    def load_data(self, cursor, batch):
+        """ Function to bulk load a batch into the license_data table by writing it to a temporary CSV file and running MySQL's LOAD DATA LOCAL INFILE."""
+        if self.dialect != 'mysql':
+            raise ValueError("LOAD DATA is only supported for MySQL.")
+
+        # Write the batch out without an index, with the '\n' line endings the statement expects on every platform and missing values as
+        # MySQL's NULL marker, then load it and clean up the file.
+        file = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, newline='', encoding='utf-8')
+        try:
+            batch.to_csv(file, index=False, header=False, lineterminator='\n', na_rep='\\N')
+            file.close()
+            columns = ", ".join(f"`{column}`" for column in batch.columns)
+            cursor.execute(f"LOAD DATA LOCAL INFILE '{file.name}' INTO TABLE license_data CHARACTER SET utf8mb4 "
+                           f"FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' LINES TERMINATED BY '\\n' ({columns})")
+        finally:
+            os.remove(file.name)
+
+    def stream(self, batches, dataset=None, method='executemany'):
+        """ Function to insert a stream of dataframes, such as the batches from License.iter_batches, and return a StatsSummary of them for the registry."""
+        summary = StatsSummary()
+        for batch in batches:
+            self.load(batch, dataset, method)
+            summary = summary + Stats.summarise(batch)
+        return summary
+
+    def register(self, dataset, summary, metadata=None, creation_time=None, counts=False):
+        """ Function to insert the numbers of a dataset into the dataset_registry table. The summary is either a StatsSummary or a validated dataframe."""
+        self.create_schema()
+        if not isinstance(summary, StatsSummary):
+            summary = Stats.summarise(summary)
+
+        row = summary.registry_row(dataset, counts)
+        row['Corruption_Percentage'] = float(row['Corruption_Percentage'])
+        row['Creation_Time'] = creation_time if creation_time is not None else datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        row['Metadata'] = json.dumps(metadata if metadata is not None else {})
+
+        with self.pool.connection() as connection:
+            connection.cursor().execute(self.insert_query('dataset_registry', list(row)), tuple(row.values()))
+            connection.commit()
+
+    def close(self):
+        """ Function to close the connections of the exporter."""
+        self.pool.close()
+
+class TableReader:
+    """This is a class to check license data already in the license_data table of a database without reading the whole table into memory. Rows are
+read in chunks ordered by id, each chunk starting after the last id of the one before, so every query only reads chunk_size rows from the index
+and no cursor or offset is kept open between chunks. It reuses the connections and dialect of an Exporter."""
+    def __init__(self, exporter, chunk_size=100000):
+        """ Function to set up a reader on the database of an exporter, reading chunk_size rows at a time."""
+        self.exporter = exporter
+        self.chunk_size = chunk_size
+
+    def select_query(self, columns, dataset=None):
+        """ Function to build the parameterized query for the chunk after a given id, of one dataset if a name is given."""
+        placeholder = DIALECTS[self.exporter.dialect]['placeholder']
+        where = f"id > {placeholder}" + (f" AND `Dataset` = {placeholder}" if dataset is not None else "")
+        return f"SELECT id, {', '.join(f'`{column}`' for column in columns)} FROM license_data WHERE {where} ORDER BY id LIMIT {int(self.chunk_size)}"
+
+    def iter_chunks(self, dataset=None, columns=None):
+        """ Function to read the license_data table, or the rows of one dataset, as a stream of dataframes of at most chunk_size rows each,
+        indexed by id. By default every column of the table is read."""
+        self.exporter.create_schema()
+        columns = list(columns) if columns is not None else Exporter.license_columns()
+        query = self.select_query(columns, dataset)
+
+        last_id = 0
+        while True:
+            # Each chunk is fetched in full before the connection is given back, so no result set is left open between chunks.
+            with self.exporter.pool.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(query, (last_id, dataset) if dataset is not None else (last_id,))
+                rows = cursor.fetchall()
+                cursor.close()
+            if not rows:
+                return
+            chunk = pd.DataFrame.from_records(rows, columns=['id'] + columns).set_index('id')
+            last_id = int(chunk.index[-1])
+            yield chunk
+            if len(rows) < self.chunk_size:
+                return
+
+    def summarise(self, dataset=None, revalidate=True):
+        """ Function to return a StatsSummary for every dataset in the license_data table, or only for the given one, as a dictionary by dataset name.
+        By default every chunk is validated again from its attributes, and with revalidate=False the stored corruption status columns are counted instead."""
+        attributes = Exporter.attributes()
+        columns = attributes + ['Dataset'] if revalidate else Exporter.license_columns()
+        summaries = {}
+        for chunk in self.iter_chunks(dataset, columns):
+            # Chunks can hold the end of one dataset and the start of the next, so they are split by dataset before summarising.
+            for name, rows in chunk.groupby('Dataset', sort=False, dropna=False):
+                rows = rows.drop(columns='Dataset')
+                if revalidate:
+                    rows = Validate.validate(rows[attributes])
+                else:
+                    rows = rows.astype({col: 'int64' for col in rows.columns if col.endswith(' Corruption')})
+                summaries[name] = summaries.get(name, StatsSummary()) + Stats.summarise(rows)
+        return summaries
+
+    def update_registry(self, summaries, counts=False, metadata=None):
+        """ Function to write the summaries from TableReader.summarise back to the dataset_registry table. The numbers of datasets that are already
+        registered are updated in place, keeping their creation time and metadata, and other datasets are registered as new. The corrupt fields
+        and attribute columns hold 0/1 flags by default, the same as Exporter.register writes, so every row of the registry means the same thing.
+        Only pass counts=True if every dataset in the registry is written with counts=True."""
+        self.exporter.create_schema()
+        placeholder = DIALECTS[self.exporter.dialect]['placeholder']
+        for dataset, summary in summaries.items():
+            row = summary.registry_row(dataset, counts)
+            row['Corruption_Percentage'] = float(row['Corruption_Percentage'])
+            del row['Dataset']
+
+            with self.exporter.pool.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(f"SELECT COUNT(*) FROM dataset_registry WHERE `Dataset` = {placeholder}", (dataset,))
+                registered = cursor.fetchone()[0] > 0
+                if registered:
+                    assignments = ", ".join(f"`{column}` = {placeholder}" for column in row)
+                    cursor.execute(f"UPDATE dataset_registry SET {assignments} WHERE `Dataset` = {placeholder}", (*row.values(), dataset))
+                    connection.commit()
+            if not registered:
+                self.exporter.register(dataset, summary, metadata, counts=counts)
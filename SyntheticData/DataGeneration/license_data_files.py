@@ -0,0 +1,167 @@
+# All required modules and initialisations.
+import os
+import pandas as pd
+from license_data_generator import Validate, Stats, StatsSummary
+
+# pyarrow is only needed for the columnar files, so it is optional.
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# File extension for each supported format.
+EXTENSIONS = {'parquet': '.parquet', 'ipc': '.arrow'}
+
+def require_pyarrow():
+    """ Function to raise a helpful error if pyarrow isn't installed."""
+    if pa is None:
+        raise ImportError("Columnar files need pyarrow, which can be installed with 'pip install pyarrow'.")
+
+class ColumnarWriter:
+    """This is a class to write license data to Parquet or Arrow IPC files one batch at a time, so datasets from generation, corruption or validation can
+be saved without holding them in memory. Rows can be split into one file per dataset, under a 'Dataset=<name>' directory for each."""
+    def __init__(self, path, format='parquet', compression='zstd', row_group_size=100000, partition_by_dataset=False):
+        """ Function to set up a writer. Without partitioning path is the file to write, and with partitioning it is the directory to write the files under.
+        Arrow IPC files can only be memory-mapped without copying if they are written with compression=None."""
+        require_pyarrow()
+        if format not in EXTENSIONS:
+            raise ValueError(f"Unknown format '{format}', expected one of {sorted(EXTENSIONS)}.")
+        self.path = path
+        self.format = format
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self.partition_by_dataset = partition_by_dataset
+        self.writers = {}
+        self.schema = None
+        self.rows_written = 0
+
+    @staticmethod
+    def to_table(df):
+        """ Function to turn a dataframe into an Arrow table with plain string columns, so batches with different categories share one schema."""
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        fields = [pa.field(field.name, pa.string()) if pa.types.is_dictionary(field.type) or pa.types.is_large_string(field.type) else field
+                  for field in table.schema]
+        return table.cast(pa.schema(fields))
+
+    def file_path(self, dataset):
+        """ Function to return the file that rows of a dataset are written to."""
+        if not self.partition_by_dataset:
+            return self.path
+        directory = os.path.join(self.path, f"Dataset={dataset}")
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"part-0{EXTENSIONS[self.format]}")
+
+    def open_writer(self, dataset):
+        """ Function to open the file writer for a dataset the first time rows are written to it."""
+        path = self.file_path(dataset)
+        if self.format == 'parquet':
+            return pq.ParquetWriter(path, self.schema, compression=self.compression or 'none')
+        options = pa.ipc.IpcWriteOptions(compression=self.compression)
+        return pa.ipc.new_file(path, self.schema, options=options)
+
+    def write(self, df, dataset=None):
+        """ Function to append a dataframe to the files. When partitioning, rows go to the file of their 'Dataset' column, or of the dataset given."""
+        if dataset is not None:
+            df = df.assign(Dataset=dataset)
+        table = ColumnarWriter.to_table(df)
+
+        # The first batch decides the schema of every file.
+        if self.schema is None:
+            self.schema = table.schema
+        table = table.select(self.schema.names).cast(self.schema)
+
+        if self.partition_by_dataset:
+            if 'Dataset' not in df.columns:
+                raise ValueError("Partitioning by dataset needs a 'Dataset' column or a dataset name.")
+            datasets = df['Dataset'].astype(str).to_numpy()
+            parts = [(name, table.filter(pa.array(datasets == name))) for name in pd.unique(datasets)]
+        else:
+            parts = [(None, table)]
+
+        for name, part in parts:
+            if name not in self.writers:
+                self.writers[name] = self.open_writer(name)
+            if self.format == 'parquet':
+                self.writers[name].write_table(part, row_group_size=self.row_group_size)
+            else:
+                self.writers[name].write_table(part, max_chunksize=self.row_group_size)
+        self.rows_written += len(df)
+
+    def close(self):
+        """ Function to finish writing every file."""
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class ColumnarReader:
+    """This is a class to read license data back from files written by ColumnarWriter. Files are memory-mapped and string columns stay in Arrow memory,
+so Validate and Stats can work on them without copying the data into Python objects first."""
+    @staticmethod
+    def files(path):
+        """ Function to return the files under a path, which is either a single file or a directory partitioned by dataset."""
+        if os.path.isfile(path):
+            return [path]
+        found = []
+        for directory, _, names in sorted(os.walk(path)):
+            found += [os.path.join(directory, name) for name in sorted(names) if os.path.splitext(name)[1] in EXTENSIONS.values()]
+        return found
+
+    @staticmethod
+    def to_dataframe(table):
+        """ Function to turn an Arrow table into a dataframe whose string columns keep using the Arrow memory."""
+        return table.to_pandas(types_mapper={pa.string(): pd.StringDtype('pyarrow')}.get, split_blocks=True)
+
+    @staticmethod
+    def read_table(file, columns=None):
+        """ Function to memory-map a single file as an Arrow table."""
+        if file.endswith(EXTENSIONS['parquet']):
+            return pq.read_table(file, columns=columns, memory_map=True)
+        # The memory map stays open for as long as the table refers to it.
+        table = pa.ipc.open_file(pa.memory_map(file)).read_all()
+        return table.select(columns) if columns is not None else table
+
+    @staticmethod
+    def iter_tables(path, batch_size=100000, columns=None):
+        """ Function to read the files under a path as a stream of Arrow tables of at most batch_size rows each."""
+        require_pyarrow()
+        for file in ColumnarReader.files(path):
+            if file.endswith(EXTENSIONS['parquet']):
+                # Parquet files are decoded one batch at a time, so only one batch is in memory at once.
+                for batch in pq.ParquetFile(file, memory_map=True).iter_batches(batch_size=batch_size, columns=columns):
+                    yield pa.Table.from_batches([batch])
+            else:
+                table = ColumnarReader.read_table(file, columns)
+                for start in range(0, table.num_rows, batch_size):
+                    yield table.slice(start, batch_size)
+
+    @staticmethod
+    def iter_batches(path, batch_size=100000, columns=None):
+        """ Function to read the files under a path as a stream of dataframes of at most batch_size rows each."""
+        for table in ColumnarReader.iter_tables(path, batch_size, columns):
+            yield ColumnarReader.to_dataframe(table)
+
+    @staticmethod
+    def read(path, columns=None):
+        """ Function to read every file under a path into one dataframe."""
+        require_pyarrow()
+        tables = [ColumnarReader.read_table(file, columns) for file in ColumnarReader.files(path)]
+        return ColumnarReader.to_dataframe(pa.concat_tables(tables))
+
+    @staticmethod
+    def summarise(path, batch_size=100000, revalidate=False):
+        """ Function to return a StatsSummary of the files under a path, one batch at a time. With revalidate=True the stored corruption status columns are
+        ignored and every batch is validated again."""
+        summary = StatsSummary()
+        for batch in ColumnarReader.iter_batches(path, batch_size):
+            if revalidate:
+                batch = Validate.validate(batch.drop(columns=[col for col in batch.columns if col.endswith(' Corruption')]))
+            summary = summary + Stats.summarise(batch)
+        return summary
@@ -1,14 +1,330 @@
 # All required modules and initialisations.
+import json
+import os
 import random
 import string
-from datetime import datetime, date, timedelta
-from faker import Faker
+from datetime import date, timedelta
+from statistics import NormalDist
+import numpy as np
 import pandas as pd
-import re
+from license_profiling import Profiler
+
+class LazyFaker:
+    """This is a class that stands in for a faker instance of one locale. Faker is only imported, and the instance only created, the first time one of its
+providers is used, so importing this module to validate data or compute stats doesn't pay for setting up faker."""
+    def __init__(self, locale):
+        """ Function to set up a stand-in for a faker instance of the locale."""
+        self.locale = locale
+        self.instance = None
+
+    @staticmethod
+    def create(locale):
+        """ Function that imports faker and returns a new faker instance of the locale."""
+        from faker import Faker
+        return Faker(locale)
+
+    def __getattr__(self, name):
+        """ Function that passes every attribute on to the faker instance, creating it first if needed."""
+        # Special attributes looked up by copy and pickle aren't passed on, since the stand-in may not be set up yet.
+        if name.startswith('__'):
+            raise AttributeError(name)
+        if self.instance is None:
+            self.instance = LazyFaker.create(self.locale)
+        return getattr(self.instance, name)
 
 # Ensure faker uses British formatting.
-fake = Faker('en_GB')
+fake = LazyFaker('en_GB')
+
+class ValuePool:
+    """This is a class to hold pools of pre-generated faker values for one locale, so that large datasets can draw values by random index
+instead of calling a faker provider for every row. Pools can be saved to and loaded from disk, and rebuilt after a set number of draws to keep variety."""
+    # Faker providers that are pooled.
+    FIELDS = ('first_name', 'last_name', 'country', 'street_name', 'city', 'postcode', 'word')
+
+    # Pools already built in this process, keyed by locale, size and seed.
+    _cache = {}
+
+    def __init__(self, locale='en_GB', size=10000, refresh_every=None, seed=None, values=None):
+        """ Function to set up a pool of size values per field for the locale. If refresh_every is set, the pool is rebuilt with new values after that many draws."""
+        self.locale = locale
+        self.size = size
+        self.refresh_every = refresh_every
+        self.seed = seed
+        self.refreshes = 0
+        self.draws = 0
+        self.rng = np.random.default_rng(seed)
+        self.values = values if values is not None else self.build()
+
+    def build(self):
+        """ Function to fill every field of the pool by calling its faker provider size times."""
+        # Seed the faker instance from the pool seed and the number of refreshes, so a seeded pool always rebuilds the same way.
+        pool_faker = LazyFaker.create(self.locale)
+        if self.seed is not None:
+            pool_faker.seed_instance(self.seed + self.refreshes)
+
+        # Duplicates are kept so common values are drawn as often as faker would return them.
+        return {field: np.array([getattr(pool_faker, field)() for _ in range(self.size)], dtype=object) for field in ValuePool.FIELDS}
+
+    def draw(self, field, num_values, rng=None):
+        """ Function to return an array of num_values values of a field, picked by random index from the pool."""
+        # Rebuild the pool first if it has been drawn from enough times.
+        if self.refresh_every is not None and self.draws >= self.refresh_every:
+            self.refreshes += 1
+            self.draws = 0
+            self.values = self.build()
+
+        self.draws += num_values
+        rng = self.rng if rng is None else rng
+        return self.values[field][rng.integers(0, self.size, size=num_values)]
+
+    def save(self, path):
+        """ Function to save the values of the pool to a JSON file."""
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({'locale': self.locale, 'size': self.size, 'values': {field: values.tolist() for field, values in self.values.items()}}, file)
+
+    @staticmethod
+    def load(path, refresh_every=None, seed=None):
+        """ Function to load a pool previously saved with ValuePool.save."""
+        with open(path, encoding='utf-8') as file:
+            saved = json.load(file)
+        values = {field: np.array(saved['values'][field], dtype=object) for field in ValuePool.FIELDS}
+        return ValuePool(saved['locale'], saved['size'], refresh_every=refresh_every, seed=seed, values=values)
+
+    @staticmethod
+    def for_locale(locale='en_GB', size=10000, cache_dir=None, seed=None):
+        """ Function to return the pool for a locale, building it only once per process. If cache_dir is given, the pool is loaded from there or saved there after building.
+        A seeded pool is kept apart from the unseeded one and from those of other seeds, so it always holds the values its seed builds."""
+        key = (locale, size, seed)
+        if key not in ValuePool._cache:
+            name = f"value_pool_{locale}_{size}.json" if seed is None else f"value_pool_{locale}_{size}_{seed}.json"
+            path = os.path.join(cache_dir, name) if cache_dir is not None else None
+            if path is not None and os.path.exists(path):
+                ValuePool._cache[key] = ValuePool.load(path, seed=seed)
+            else:
+                ValuePool._cache[key] = ValuePool(locale, size, seed=seed)
+                if path is not None:
+                    os.makedirs(cache_dir, exist_ok=True)
+                    ValuePool._cache[key].save(path)
+        return ValuePool._cache[key]
+
+class DateCodec:
+    """This is a class to convert dates between 'dd.mm.yyyy' strings and int32 day numbers counted from 01.01.1970, so dates can be generated and compared with
+integer arithmetic. Days between 1900 and 2199 are formatted and parsed through lookup tables that are built once, on first use."""
+    FIRST_DAY = (date(1900, 1, 1) - date(1970, 1, 1)).days
+    LAST_DAY = (date(2199, 12, 31) - date(1970, 1, 1)).days
+
+    # Day number given to strings that aren't valid dates. It is lower than any real date, so it fails every date range check.
+    MISSING = np.iinfo(np.int32).min
+
+    _strings = None
+    _days = None
+
+    @staticmethod
+    def tables():
+        """ Function to return the lookup tables from day number to string and from string to position in the first table, building them on first use."""
+        if DateCodec._strings is None:
+            days = np.arange(DateCodec.FIRST_DAY, DateCodec.LAST_DAY + 1)
+            dates = days.astype('datetime64[D]')
+            years = dates.astype('datetime64[Y]').astype(int) + 1970
+            months = dates.astype('datetime64[M]').astype(int) % 12 + 1
+            day_of_month = (dates - dates.astype('datetime64[M]')).astype(int) + 1
+            DateCodec._strings = np.array([f"{d:02d}.{m:02d}.{y}" for d, m, y in zip(day_of_month, months, years)], dtype=object)
+            # An index rather than a dictionary, so lookups hash only the strings being parsed instead of converting the whole table every time.
+            DateCodec._days = pd.Index(DateCodec._strings)
+        return DateCodec._strings, DateCodec._days
+
+    @staticmethod
+    def from_date(day):
+        """ Function to return the day number of a date."""
+        return (day - date(1970, 1, 1)).days
+
+    @staticmethod
+    def today():
+        """ Function to return the day number of today."""
+        return DateCodec.from_date(date.today())
+
+    @staticmethod
+    def format(days):
+        """ Function to format an array of day numbers as 'dd.mm.yyyy' strings by looking them up in the table."""
+        strings, _ = DateCodec.tables()
+        days = np.asarray(days, dtype='int64')
+        in_table = (days >= DateCodec.FIRST_DAY) & (days <= DateCodec.LAST_DAY)
+        formatted = strings[np.where(in_table, days - DateCodec.FIRST_DAY, 0)]
+
+        # Days outside the table are rare, so format them one at a time.
+        for i in np.flatnonzero(~in_table):
+            formatted[i] = (date(1970, 1, 1) + timedelta(days=int(days[i]))).strftime('%d.%m.%Y')
+        return formatted
+
+    @staticmethod
+    def parse(values):
+        """ Function to parse a series of 'dd.mm.yyyy' strings into an int32 array of day numbers, with DateCodec.MISSING wherever the date is invalid.
+        Each distinct string is parsed once, through the table where possible and with the same rules as strptime otherwise."""
+        _, lookup = DateCodec.tables()
+        codes, uniques = Compact.factorize(values)
+        positions = lookup.get_indexer(uniques)
+        days = pd.Series(np.where(positions >= 0, positions + DateCodec.FIRST_DAY, np.nan))
+
+        # Parse whatever isn't in the table, like dates without leading zeros or far outside today's range.
+        misses = days.isna()
+        if misses.any():
+            parsed = pd.to_datetime(pd.Series(uniques[misses.to_numpy()], dtype=object), format='%d.%m.%Y', errors='coerce')
+            days[misses] = ((parsed - pd.Timestamp(1970, 1, 1)).dt.days).to_numpy()
+
+        days = days.fillna(DateCodec.MISSING).to_numpy(dtype='int64').astype('int32')
+        return days[codes]
+
+    @staticmethod
+    def format_one(day):
+        """ Function to format a single day number as a 'dd.mm.yyyy' string."""
+        return DateCodec.format([day])[0]
 
+    @staticmethod
+    def parse_one(value):
+        """ Function to parse a single 'dd.mm.yyyy' string into a day number, or DateCodec.MISSING if it is invalid."""
+        return int(DateCodec.parse(pd.Series([value], dtype=object))[0])
+
+class Compact:
+    """This is a class to convert license datasets to an opt-in compact representation that uses a fraction of the memory: columns with few distinct
+values, including the dates, become categorical, the driver numbers and addresses become Arrow strings when pyarrow is installed, and the corruption
+status columns become uint8. Corrupt, Validate and Stats all accept compact dataframes."""
+    # Columns with a limited number of distinct values, which are dictionary-encoded.
+    CATEGORICAL_COLUMNS = ['First Name', 'Last Name', 'Date of Birth', 'Place of Birth', 'Gender', 'Date of Issue', 'Date of Expiry', 'Issuing Authority']
+
+    # Columns with mostly distinct values.
+    STRING_COLUMNS = ['License Number', 'Address']
+
+    @staticmethod
+    def string_dtype():
+        """ Function to return the dtype used for the columns with mostly distinct values: Arrow strings if pyarrow is installed, otherwise Python objects."""
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return object
+        return pd.StringDtype('pyarrow')
+
+    @staticmethod
+    def compact(df):
+        """ Function to return a compact copy of a license dataframe, validated or not."""
+        columns = {}
+        for column in df.columns:
+            if column in Compact.CATEGORICAL_COLUMNS:
+                columns[column] = df[column].astype('category')
+            elif column in Compact.STRING_COLUMNS:
+                columns[column] = df[column].astype(Compact.string_dtype())
+            elif column.endswith(' Corruption'):
+                columns[column] = df[column].astype('uint8')
+            else:
+                columns[column] = df[column]
+        return pd.DataFrame(columns, index=df.index)
+
+    @staticmethod
+    def is_compact(series):
+        """ Function to check if a column uses one of the compact representations."""
+        return isinstance(series.dtype, (pd.CategoricalDtype, pd.StringDtype))
+
+    @staticmethod
+    def factorize(values):
+        """ Function to split a column into integer codes and the distinct values they refer to, as strings. Categorical columns reuse their existing codes,
+        and Arrow string columns are factorized without converting every value to a Python string first."""
+        if isinstance(values.dtype, (pd.CategoricalDtype, pd.StringDtype)):
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                codes, categories = values.cat.codes.to_numpy().astype('int64'), values.cat.categories
+            else:
+                codes, categories = pd.factorize(values)
+
+            # Missing values have code -1, and are given the string str() would give them after the distinct values.
+            missing = 'nan' if isinstance(values.dtype, pd.CategoricalDtype) else str(pd.NA)
+            uniques = np.append(pd.Index(categories).astype(str).to_numpy(dtype=object), missing)
+            return np.where(codes < 0, len(uniques) - 1, codes), uniques
+        codes, uniques = pd.factorize(values.astype(str))  # Ensure they're treated as strings.
+        return codes, np.asarray(uniques, dtype=object)
+
+    @staticmethod
+    def replace_values(series, rows, values):
+        """ Function to return a copy of a column with the values at the given row positions replaced, keeping its compact dtype."""
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Add any new values to the categories before assigning them.
+            new_categories = pd.Index(pd.unique(np.asarray(values, dtype=object))).difference(series.cat.categories)
+            series = series.cat.add_categories(new_categories)
+        else:
+            series = series.copy()
+        series.iloc[rows] = values
+        return series
+
+class DriverNumberRegistry:
+    """This is a class to make driver numbers unique across every batch they are issued in. It keeps a 64-bit hash of each issued number in a few sorted
+arrays that are merged as they grow, which takes 8 bytes per number (about 800MB for 100 million numbers, and up to twice that while the largest arrays merge).
+A number whose hash is already known gets new random letters, and if every pair of letters for its first 14 characters is taken the row is counted as exhausted."""
+    LETTERS = np.array([a + b for a in string.ascii_uppercase for b in string.ascii_uppercase], dtype=object)
+
+    def __init__(self, redraws=8):
+        """ Function to set up an empty registry. Colliding numbers get up to redraws rounds of random new letters before every pair of letters is tried."""
+        self.redraws = redraws
+        self.runs = []
+        self.exhausted = []
+
+    def __len__(self):
+        return sum(len(run) for run in self.runs)
+
+    @staticmethod
+    def hash(numbers):
+        """ Function to hash an array of driver numbers into uint64 values."""
+        return pd.util.hash_array(np.asarray(numbers, dtype=object), categorize=False)
+
+    def contains(self, hashes):
+        """ Function that returns which of the hashes have already been issued."""
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self.runs:
+            positions = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            found |= run[positions] == hashes
+        return found
+
+    def add(self, hashes):
+        """ Function to add hashes to the registry as a new sorted array, merging it with the previous array while that one is no bigger,
+        so there are only ever a logarithmic number of arrays to search."""
+        if len(hashes) == 0:
+            return
+        run = np.sort(hashes)
+        while self.runs and len(self.runs[-1]) <= len(run):
+            run = np.sort(np.concatenate([self.runs.pop(), run]), kind='mergesort')
+        self.runs.append(run)
+
+    def assign(self, numbers, rng=None):
+        """ Function that returns a copy of the driver numbers where every number is new to the registry, and adds them to it. Repeated numbers keep
+        their first 14 characters and only get new last two letters. Also returns a boolean array marking the rows whose first 14 characters had no
+        free letters left, which keep their repeated number."""
+        rng = np.random.default_rng() if rng is None else rng
+        numbers = np.array(numbers, dtype=object)
+        prefixes = pd.Series(numbers, dtype=object).str[:-2].to_numpy(dtype=object)
+        exhausted = np.zeros(len(numbers), dtype=bool)
+
+        # Accept every number that is new, both to the registry and within the batch, then redraw the letters of the rest and try again.
+        pending = np.arange(len(numbers))
+        for _ in range(self.redraws + 1):
+            hashes = DriverNumberRegistry.hash(numbers[pending])
+            taken = self.contains(hashes) | pd.Series(hashes).duplicated().to_numpy()
+            self.add(hashes[~taken])
+            pending = pending[taken]
+            if len(pending) == 0:
+                return numbers, exhausted
+            numbers[pending] = prefixes[pending] + DriverNumberRegistry.LETTERS[rng.integers(0, len(DriverNumberRegistry.LETTERS), size=len(pending))]
+
+        # Numbers that still collide have crowded first 14 characters, so try every pair of letters for them.
+        for row in pending:
+            candidates = prefixes[row] + DriverNumberRegistry.LETTERS
+            hashes = DriverNumberRegistry.hash(candidates)
+            free = np.flatnonzero(~self.contains(hashes))
+            if len(free):
+                pick = rng.choice(free)
+                numbers[row] = candidates[pick]
+                self.add(hashes[[pick]])
+            else:
+                exhausted[row] = True
+                self.exhausted.append(numbers[row])
+        return numbers, exhausted
+
+@Profiler.instrument
 class License:
     """This is a class to generate a synthetic driving license for a person and all the associated identity data for them.
 This inludes their First Name, Last Name, Date of Birth, Place of Birth, Date of Issue, Date of Expiry, Issuing Authority, 
@@ -27,13 +343,12 @@ Driver Number, Address and Gender."""
     def date_of_birth():
         """ Function to return a fake date of birth for the person. To meet criteria this will be any date after 1950, and before 17 years ago from today"""
         # Specify constraints for the earliest and latest possible dates of birth.
-        today = date.today()
-        earliest_dob = date(1950, 1, 1) # After 1950.
-        lastest_dob = today - timedelta(days=17*365)  # 17 years ago from today.
+        earliest_dob = DateCodec.from_date(date(1950, 1, 1)) # After 1950.
+        lastest_dob = DateCodec.today() - 17*365  # 17 years ago from today.
 
         # Uses constraints to generate a date. 
-        date_of_birth = fake.date_between_dates(earliest_dob, lastest_dob)
-        return date_of_birth.strftime('%d.%m.%Y')
+        date_of_birth = fake.random_int(earliest_dob, lastest_dob)
+        return DateCodec.format_one(date_of_birth)
 
     @staticmethod   
     def birthplace():
@@ -50,20 +365,19 @@ Driver Number, Address and Gender."""
     def date_of_issue(date_of_birth):
         """ Function to return a fake date of issue for the person's license. To meet criteria this will be any date 17 years from their date of birth, and before today."""
         # Specify constraints for the earliest and latest possible dates of issue.
-        dob = datetime.strptime(date_of_birth, '%d.%m.%Y')
-        earliest_issue = dob + timedelta(days=17*365)  # 17 years after date of birth.
-        latest_issue = date.today()  # Cant be issued after today.
+        dob = DateCodec.parse_one(date_of_birth)
+        earliest_issue = dob + 17*365  # 17 years after date of birth.
+        latest_issue = DateCodec.today()  # Cant be issued after today.
 
         # Use constraints to generate a date.
-        date_of_issue = fake.date_between(start_date=earliest_issue, end_date=latest_issue)
-        return date_of_issue.strftime('%d.%m.%Y')
+        date_of_issue = fake.random_int(earliest_issue, latest_issue)
+        return DateCodec.format_one(date_of_issue)
     
     @staticmethod
     def date_of_expiry(date_of_issue):
         """ Function to return a fake date of expiry for the person's license, which is 10 years from the date of issue."""
-        date_of_issue = datetime.strptime(date_of_issue, '%d.%m.%Y')
-        date_of_expiry = date_of_issue + timedelta(days=10*365)  # 10 years after date of issue
-        return date_of_expiry.strftime('%d.%m.%Y')
+        date_of_expiry = DateCodec.parse_one(date_of_issue) + 10*365  # 10 years after date of issue
+        return DateCodec.format_one(date_of_expiry)
     
     @staticmethod
     def issuing_authority():
@@ -141,441 +455,1054 @@ Driver Number, Address and Gender."""
         })
     
     @staticmethod
-    def generate_dataset(num_times):
+    def generate_batch(num_rows, rng=None, faker=None, pool=None, compact=False, registry=None, today=None, return_exhausted=False):
+        """ Function to generate a dataframe of synthetic people by filling every column at once as an array, instead of one row at a time.
+        The same constraints as the single row functions apply: date of birth between 1950 and 17 years ago, date of issue at least 17 years
+        after the date of birth, date of expiry 10 years after the date of issue, "DA1" as the issuing authority and the same driver number layout.
+        If a ValuePool is given, the text values are drawn from it instead of calling faker for every row, and with compact=True the dataframe uses the Compact representation.
+        If a DriverNumberRegistry is given, every driver number is unique across all the batches generated with that registry, except in rows whose
+        first 14 characters have no free letters left. With return_exhausted=True a boolean array marking those rows is returned after the dataframe.
+        The date ranges end at today, a date that defaults to the current date, so seeded batches only come out the same if today is fixed too."""
+        # Default to a fresh random generator and the module level faker instance.
+        rng = np.random.default_rng() if rng is None else rng
+        faker = fake if faker is None else faker
+
+        # Generate the text columns from the pool or from faker.
+        if pool is not None:
+            first_names = pool.draw('first_name', num_rows, rng)
+            last_names = pool.draw('last_name', num_rows, rng)
+            birthplaces = pool.draw('country', num_rows, rng)
+        else:
+            first_names = [faker.first_name() for _ in range(num_rows)]
+            last_names = [faker.last_name() for _ in range(num_rows)]
+            birthplaces = [faker.country() for _ in range(num_rows)]
+        genders = np.array(['Male', 'Female'], dtype=object)[rng.integers(0, 2, size=num_rows)]
+
+        # Dates of birth: any day from 1950 up to 17 years ago, as int32 day numbers.
+        today = DateCodec.today() if today is None else DateCodec.from_date(today)
+        earliest_dob = DateCodec.from_date(date(1950, 1, 1))
+        latest_dob = today - 17*365
+        dob_days = rng.integers(earliest_dob, latest_dob + 1, size=num_rows, dtype=np.int32)
+
+        # Dates of issue: any day from 17 years after the date of birth up to today. Dates of expiry: 10 years after the date of issue.
+        earliest_issue = dob_days + 17*365
+        issue_days = earliest_issue + np.floor(rng.random(num_rows) * (today - earliest_issue + 1)).astype(np.int32)
+        expiry_days = issue_days + 10*365
+
+        date_of_birth = DateCodec.format(dob_days)
+        date_of_issue = DateCodec.format(issue_days)
+        date_of_expiry = DateCodec.format(expiry_days)
+
+        # Driver numbers: the first 14 characters follow the same layout as License.driver_num and the validator rebuilds them the same way, so share its code.
+        letters = np.array(list(string.ascii_uppercase), dtype=object)
+        prefixes = Validate.expected_driver_num_prefix(pd.Series(first_names, dtype=object), pd.Series(last_names, dtype=object),
+                                                       pd.Series(genders, dtype=object), pd.Series(date_of_birth, dtype=object))
+        driver_nums = prefixes.to_numpy(dtype=object) + letters[rng.integers(0, 26, size=num_rows)] + letters[rng.integers(0, 26, size=num_rows)]
+        exhausted = np.zeros(num_rows, dtype=bool)
+        if registry is not None:
+            driver_nums, exhausted = registry.assign(driver_nums, rng)
+
+        # Addresses: house number and street, city and postcode.
+        house_numbers = rng.integers(1, 1000, size=num_rows).astype(str).astype(object)
+        if pool is not None:
+            addresses = house_numbers + " " + pool.draw('street_name', num_rows, rng) + ", " + pool.draw('city', num_rows, rng) + ", " + pool.draw('postcode', num_rows, rng)
+        else:
+            addresses = [f"{house_number} {faker.street_name()}, {faker.city()}, {faker.postcode()}" for house_number in house_numbers]
+
+        df = pd.DataFrame({
+            "First Name": first_names,
+            "Last Name": last_names,
+            "Date of Birth": date_of_birth,
+            "Place of Birth": birthplaces,
+            "Gender": genders,
+            "Date of Issue": date_of_issue,
+            "Date of Expiry": date_of_expiry,
+            "Issuing Authority": np.full(num_rows, License.issuing_authority(), dtype=object),
+            "License Number": driver_nums,
+            "Address": addresses
+        })
+        df = Compact.compact(df) if compact else df
+        return (df, exhausted) if return_exhausted else df
+
+    @staticmethod
+    def iter_batches(total, batch_size, rng=None, pool=None, compact=False, registry=None, today=None, return_exhausted=False):
+        """ Function to generate a dataset of total rows as a stream of dataframes with at most batch_size rows each, so memory depends on the batch size and not the total.
+        Each batch keeps the row numbers it would have in the full dataset, and can be passed straight to Corrupt.introduce_corruptions and Validate.validate.
+        With return_exhausted=True every batch comes with the array from License.generate_batch marking its rows with a repeated driver number."""
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1.")
+
+        # Share one random generator across batches so they continue the same random sequence.
+        rng = np.random.default_rng() if rng is None else rng
+        for start in range(0, total, batch_size):
+            batch, exhausted = License.generate_batch(min(batch_size, total - start), rng=rng, pool=pool, compact=compact, registry=registry, today=today,
+                                                      return_exhausted=True)
+            batch.index = pd.RangeIndex(start, start + len(batch))
+            yield (batch, exhausted) if return_exhausted else batch
+
+    @staticmethod
+    def generate_dataset(num_times, rng=None, pool=None, compact=False, registry=None, today=None, return_exhausted=False):
         """ Function to generate a dataframe containing however many rows of synthetic people you want."""
-        # Manually generate first row on which to append subsequent rows.
-        data = License.generate_credentials()
+        # Generate all the rows in one batch so the dataframe is only built once.
+        return License.generate_batch(num_times, rng=rng, pool=pool, compact=compact, registry=registry, today=today, return_exhausted=return_exhausted)
+
+    @staticmethod
+    def generate_shard(num_rows, seed_sequence, pool=None, today=None):
+        """ Function to generate one shard of a parallel run, using its own seeded faker instance and random generator instead of the shared module level state."""
+        # Seed faker and the numpy generator from the shard's own seed sequence.
+        faker_seed = seed_sequence.generate_state(2)[0]
+        shard_faker = LazyFaker.create('en_GB')
+        shard_faker.seed_instance(int(faker_seed))
+        return License.generate_batch(num_rows, rng=np.random.default_rng(seed_sequence), faker=shard_faker, pool=pool, today=today)
+
+    @staticmethod
+    def generate_parallel(num_rows, workers, seed=None, pool=None, compact=False, registry=None, today=None, return_exhausted=False):
+        """ Function to generate a dataframe by splitting the rows into one shard per worker and generating the shards on a process pool.
+        Every shard is seeded from the given seed and the shards are merged back in order, so the same seed, number of workers and today date always
+        give the same dataset. today defaults to the current date, which is read once here so every shard uses the same one.
+        If a DriverNumberRegistry is given, the driver numbers of the merged shards are made unique in this process, since workers can't share a registry,
+        and return_exhausted=True returns the rows left with a repeated driver number as in License.generate_batch."""
+        if workers < 1:
+            raise ValueError("workers must be at least 1.")
+
+        # Split the rows as evenly as possible and give every shard its own child seed.
+        shard_sizes = [len(shard) for shard in np.array_split(np.arange(num_rows), workers)]
+        seed_sequence = np.random.SeedSequence(seed)
+        shard_seeds = seed_sequence.spawn(workers)
+        today = date.today() if today is None else today
+
+        if workers == 1:
+            shards = [License.generate_shard(shard_sizes[0], shard_seeds[0], pool, today)]
+        else:
+            # The process pool is only imported here, as multiprocessing is slow to import and most runs don't need it.
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                shards = list(executor.map(License.generate_shard, shard_sizes, shard_seeds, [pool] * workers, [today] * workers))
+
+        # Compact the merged dataset, so every shard shares the same categories.
+        df = pd.concat(shards, ignore_index=True)
+        exhausted = np.zeros(len(df), dtype=bool)
+        if registry is not None:
+            df['License Number'], exhausted = registry.assign(df['License Number'], np.random.default_rng(seed_sequence.spawn(1)[0]))
+        df = Compact.compact(df) if compact else df
+        return (df, exhausted) if return_exhausted else df
+
+class CorruptionLog:
+    """This is a class to keep the ground truth of what the Corrupt functions changed, as sparse (row, column, corruption type) triples held in COO arrays.
+Rows are positions in the dataframe that was corrupted, so logs of separate batches can be joined with extend and an offset for each batch."""
+    TYPES = ['character', 'format', 'swap', 'impossible', 'word', 'random', 'edit', 'truncate']
+
+    def __init__(self):
+        """ Function to set up an empty log."""
+        self.columns = []
+        self.parts = []
+        self.arrays = None
+
+    def column_code(self, column_name):
+        """ Function that returns the code of a column, adding the column on first use."""
+        if column_name not in self.columns:
+            self.columns.append(column_name)
+        return self.columns.index(column_name)
+
+    def record(self, column_name, rows, types):
+        """ Function that records the corrupted rows of a column, with one corruption type for all of them or one per row."""
+        rows = np.asarray(rows, dtype='int64')
+        types = np.full(len(rows), CorruptionLog.TYPES.index(types), dtype='int8') if isinstance(types, str) else \
+            pd.Categorical(np.asarray(types, dtype=object), categories=CorruptionLog.TYPES).codes.astype('int8')
+        self.parts.append((rows, np.full(len(rows), self.column_code(column_name), dtype='int16'), types))
+        self.arrays = None
+
+    def coo(self):
+        """ Function that returns the log as three arrays of equal length: row positions, column codes (positions in self.columns) and type codes (positions in CorruptionLog.TYPES)."""
+        if self.arrays is None:
+            parts = self.parts or [(np.empty(0, dtype='int64'), np.empty(0, dtype='int16'), np.empty(0, dtype='int8'))]
+            self.arrays = tuple(np.concatenate(arrays) for arrays in zip(*parts))
+            self.parts = [self.arrays]
+        return self.arrays
 
-        # Loop to generate subsequent rows and append them on.
-        for i in range(num_times-1):
-            synthetic_person = License.generate_credentials()
-            data = pd.concat([data, synthetic_person], ignore_index=True)
+    def __len__(self):
+        return len(self.coo()[0])
 
-        return data
+    def extend(self, other, offset=0):
+        """ Function that adds the triples of another log, with offset added to its rows, such as the logs of the batches of License.iter_batches."""
+        rows, columns, types = other.coo()
+        codes = np.array([self.column_code(column) for column in other.columns], dtype='int16')
+        self.parts.append((rows + offset, codes[columns] if len(codes) else columns, types))
+        self.arrays = None
+        return self
 
+    def to_frame(self):
+        """ Function that returns the log as a dataframe with one row per corrupted cell."""
+        rows, columns, types = self.coo()
+        return pd.DataFrame({'Row': rows,
+                             'Column': pd.Categorical.from_codes(columns, categories=self.columns),
+                             'Type': pd.Categorical.from_codes(types, categories=CorruptionLog.TYPES)})
+
+    def mask(self, column_name, num_rows):
+        """ Function that returns a boolean array marking the corrupted rows of a column."""
+        rows, columns, _ = self.coo()
+        mask = np.zeros(num_rows, dtype=bool)
+        if column_name in self.columns:
+            mask[rows[columns == self.columns.index(column_name)]] = True
+        return mask
+
+    def bitset(self, column_name, num_rows):
+        """ Function that returns the corrupted rows of a column as a bitset packed into uint8, one bit per row."""
+        return np.packbits(self.mask(column_name, num_rows))
+
+    def insert_flags(self, df):
+        """ Function that adds the corruption status columns to a corrupted dataframe from the log instead of running Validate, so Stats can describe
+        the true corruption. Only the license columns Corrupt knows about get a status column, so extra columns such as Dataset are left as they are,
+        and license columns the log knows nothing about are marked as not corrupt."""
+        df = df.copy(deep=False)
+        for column_name in [col for col in Corrupt.COLUMNS if col in df.columns]:
+            df = Validate.insert_flags(df, column_name, self.mask(column_name, len(df)))
+        return df
+
+    def score(self, validated_df):
+        """ Function that compares the corruption status columns of a validated dataframe with the log, and returns a dataframe with the true positives,
+        false positives, false negatives, precision and recall of the validator of each column."""
+        scores = {}
+        for column_name in [col.replace(' Corruption', '') for col in validated_df.columns if col.endswith(' Corruption')]:
+            flagged = validated_df[f"{column_name} Corruption"].to_numpy() != 0
+            corrupted = self.mask(column_name, len(validated_df))
+            true_positives = int((flagged & corrupted).sum())
+            false_positives = int((flagged & ~corrupted).sum())
+            false_negatives = int((~flagged & corrupted).sum())
+            scores[column_name] = {
+                'True Positives': true_positives,
+                'False Positives': false_positives,
+                'False Negatives': false_negatives,
+                'Precision': true_positives / (true_positives + false_positives) if true_positives + false_positives else 1.0,
+                'Recall': true_positives / (true_positives + false_negatives) if true_positives + false_negatives else 1.0
+            }
+        return pd.DataFrame.from_dict(scores, orient='index')
+
+@Profiler.instrument
 class Corrupt:
-    """This is a class containing functions to corrupt the data generated by the class License."""
+    """This is a class containing functions to corrupt the data generated by the class License. Each function first picks the rows to corrupt
+    with a random mask at the corruption level, and then only works on those rows, so low corruption levels only cost a small share of the work.
+    Every function takes an optional CorruptionLog, which records the cells it changed and how."""
+    # The kind of corruption for each column of the license dataframe, in the order introduce_corruptions corrupts them.
+    COLUMNS = {'First Name': 'name', 'Last Name': 'name', 'Date of Birth': 'date', 'Place of Birth': 'name', 'Gender': 'gender',
+               'Date of Issue': 'date', 'Date of Expiry': 'date', 'Issuing Authority': 'authority', 'License Number': 'drivernum', 'Address': 'address'}
+
+    # Characters put into corrupted names, and into corrupted authorities and driver numbers.
+    NAME_CHARACTERS = np.array(list(string.digits + string.punctuation), dtype=object)
+    EDIT_CHARACTERS = np.array(list(string.ascii_uppercase + string.digits), dtype=object)
+
     @staticmethod
-    def introduce_name_corruption(df, column_name, corruption_level):
-        """ Function that specifies the column in a database to be corrupted, as well as the corruption level (1 is Fully Corrupted)."""
-        def corrupt_name(name):
-            """ Function that iterates through every row in a column containing names of things to introduce corruption."""
-            new_name = ''
-            for char in name:
-                if random.random() < corruption_level:
-                    # Introduce corruption by randomly replace/add special characters or numbers.
-                    new_char = random.choice(string.digits + string.punctuation)
-                else:
-                    new_char = char
-                new_name += new_char
-            return new_name
-        
-        # Apply the corruption function to the column.
-        df[column_name] = df[column_name].apply(corrupt_name)
+    def select_rows(num_rows, corruption_level, rng):
+        """ Function that picks which of num_rows rows get corrupted, where every row is picked with probability corruption_level, and returns their sorted positions."""
+        # Draw how many rows are picked, then which ones, so the cost depends on the number of picked rows.
+        num_picked = rng.binomial(num_rows, min(max(corruption_level, 0), 1))
+        return np.sort(rng.choice(num_rows, size=num_picked, replace=False))
+
+    @staticmethod
+    def replace_values(df, column_name, rows, values, log=None, types=None):
+        """ Function that replaces the values at the given row positions of a column with new values. If a CorruptionLog is given, the rows whose
+        value actually changed are recorded in it with their corruption types."""
+        if len(rows) == 0:
+            return df
+        Profiler.count('cells_corrupted', len(rows))
+        if log is not None:
+            values = np.asarray(values, dtype=object)
+            changed = df[column_name].iloc[rows].to_numpy(dtype=object) != values
+            log.record(column_name, np.asarray(rows)[changed], types if isinstance(types, str) else np.asarray(types, dtype=object)[changed])
+
+        # Write into a copy of the column so other dataframes sharing the original values are left untouched.
+        if Compact.is_compact(df[column_name]):
+            df[column_name] = Compact.replace_values(df[column_name], rows, values)
+            return df
+        column = df[column_name].to_numpy(dtype=object, copy=True)
+        column[rows] = values
+        df[column_name] = column
         return df
-    
+
     @staticmethod
-    def introduce_date_corruption(df, column_name, corruption_level):
+    def introduce_name_corruption(df, column_name, corruption_level, rng=None, log=None):
+        """ Function that specifies the column in a database to be corrupted, as well as the corruption level (1 is Fully Corrupted)."""
+        rng = np.random.default_rng() if rng is None else rng
+        names = df[column_name].to_numpy(dtype=object)
+
+        # Every character is corrupted with probability corruption_level, so pick the character positions across the whole column at once.
+        lengths = np.fromiter(map(len, names), dtype='int64', count=len(names))
+        ends = np.cumsum(lengths)
+        positions = Corrupt.select_rows(int(ends[-1]) if len(ends) else 0, corruption_level, rng)
+        rows = np.searchsorted(ends, positions, side='right')
+        offsets = positions - (ends[rows] - lengths[rows])
+
+        # Introduce corruption by randomly replacing the picked characters with special characters or numbers.
+        new_characters = Corrupt.NAME_CHARACTERS[rng.integers(0, len(Corrupt.NAME_CHARACTERS), size=len(positions))]
+        corrupted_rows, corrupted_names = Corrupt.replace_characters(names, rows, offsets, new_characters)
+        return Corrupt.replace_values(df, column_name, corrupted_rows, corrupted_names, log, 'character')
+
+    @staticmethod
+    def replace_characters(names, rows, offsets, new_characters):
+        """ Function that puts new characters at the given offsets of the names at the given rows, where the rows are sorted, and returns the rows
+        that had a character replaced with their new names."""
+        # Rebuild only the names that had a character picked.
+        corrupted_rows, starts = np.unique(rows, return_index=True)
+        stops = np.append(starts[1:], len(rows))
+        corrupted_names = []
+        for row, start, stop in zip(corrupted_rows, starts, stops):
+            name = list(names[row])
+            for offset, new_character in zip(offsets[start:stop], new_characters[start:stop]):
+                name[offset] = new_character
+            corrupted_names.append(''.join(name))
+        return corrupted_rows, corrupted_names
+
+    @staticmethod
+    def introduce_date_corruption(df, column_name, corruption_level, rng=None, log=None):
         """ Function that specifies any date column to be corrupted, as well as the corruption level (1 is Fully Corrupted)."""
-        def corrupt_date(date):
-            """ Function that iterates through every row in the column containing a date to introduce corruption."""
-            corrupted_date = date
-            if random.random() < corruption_level:
-                # Introduce various corruptions based on the corruption level.
-                action = random.random()
-                if action < 0.25:   # 25% chance of changing format by replacing '.' with '/'.
-                    corrupted_date = date.replace('.', '/')
-                elif action < 0.5:  # 25% chance of swapping day and month
-                    day, month, year = date.split('.')
-                    corrupted_date = f"{month}.{day}.{year}"
-                else:   # 50% chance of introducing impossible values.
-                    day, month, year = date.split('.')
-                    corrupted_day = str(random.randint(32, 99))
-                    corrupted_month = str(random.randint(13, 99))
-                    corrupted_date = f"{corrupted_day}.{corrupted_month}.{year}"
-            return corrupted_date
-        
-        # Apply the corruption function to the column.
-        df[column_name] = df[column_name].apply(corrupt_date)
-        return df
-    
+        rng = np.random.default_rng() if rng is None else rng
+        rows = Corrupt.select_rows(len(df), corruption_level, rng)
+        corrupted_dates, types = Corrupt.corrupt_dates(df[column_name].to_numpy(dtype=object)[rows], rng)
+        return Corrupt.replace_values(df, column_name, rows, corrupted_dates, log, types)
+
     @staticmethod
-    def introduce_gender_corruption(df, column_name, corruption_level):
-        """ Function that specifies the gender column to be corrupted, as well as the corruption level (1 is Fully Corrupted)."""
-        def corrupt_gender(gender):
-            """ Function that iterates through every row in the column containing gender to introduce corruption by returning any word that isn't Male or Female."""
-            corrupted_gender = gender
-            if random.random() < corruption_level:
-                # Replace gender with a random word if corruption level is met.
-                random_word = fake.word().capitalize()
-                corrupted_gender = random_word
-            return corrupted_gender
-
-        # Apply the corruption function to the column.
-        df[column_name] = df[column_name].apply(corrupt_gender)
-        return df
+    def corrupt_dates(dates, rng):
+        """ Function that corrupts every date of an array, and returns the corrupted dates with the corruption type of each."""
+        dates = pd.Series(dates, dtype=object)
+        corrupted_dates = dates.copy()
+
+        # Introduce various corruptions based on the corruption level.
+        action = rng.random(len(dates))
+        change_format = action < 0.25   # 25% chance of changing format by replacing '.' with '/'.
+        swap = (action >= 0.25) & (action < 0.5)    # 25% chance of swapping day and month
+        impossible = action >= 0.5  # 50% chance of introducing impossible values.
+
+        corrupted_dates[change_format] = dates[change_format].str.replace('.', '/', regex=False)
+        if len(dates):
+            parts = dates.str.split('.', n=2, expand=True).reindex(columns=range(3))
+            corrupted_dates[swap] = parts[1][swap] + '.' + parts[0][swap] + '.' + parts[2][swap]
+            corrupted_day = pd.Series(rng.integers(32, 100, size=len(dates)).astype(str), dtype=object)
+            corrupted_month = pd.Series(rng.integers(13, 100, size=len(dates)).astype(str), dtype=object)
+            corrupted_dates[impossible] = corrupted_day[impossible] + '.' + corrupted_month[impossible] + '.' + parts[2][impossible]
+
+        return corrupted_dates.to_numpy(dtype=object), np.select([change_format, swap], ['format', 'swap'], 'impossible')
+
+    @staticmethod
+    def introduce_gender_corruption(df, column_name, corruption_level, rng=None, log=None, pool=None):
+        """ Function that specifies the gender column to be corrupted, as well as the corruption level (1 is Fully Corrupted).
+        If a ValuePool is given, the replacement words are drawn from it instead of calling faker for every cell."""
+        rng = np.random.default_rng() if rng is None else rng
+        rows = Corrupt.select_rows(len(df), corruption_level, rng)
+        corrupted_genders, types = Corrupt.corrupt_genders(df[column_name].to_numpy(dtype=object)[rows], rng, pool)
+        return Corrupt.replace_values(df, column_name, rows, corrupted_genders, log, types)
+
+    @staticmethod
+    def corrupt_genders(genders, rng, pool=None):
+        """ Function that corrupts every gender of an array, and returns the corrupted genders with their corruption type."""
+        # Replace gender with a random word that isn't Male or Female.
+        random_words = pool.draw('word', len(genders), rng) if pool is not None else [fake.word() for _ in range(len(genders))]
+        return pd.Series(random_words, dtype=object).str.capitalize().to_numpy(dtype=object), 'word'
 
     @staticmethod
-    def introduce_authority_corruption(df, column_name, corruption_level):
+    def introduce_authority_corruption(df, column_name, corruption_level, rng=None, log=None):
         """ Function that specifies the issuing authority column to be corrupted, as well as the corruption level (1 is Fully Corrupted)."""
-        def corrupt_authority(authority):
-            """ Function that iterates through every row in the column containing the issuing authority to introduce corruption by returning any random word that is max 4 characters long."""
-            if random.random() < corruption_level:
-                new_authority = ''.join(random.choices(string.ascii_uppercase + string.digits, k=random.randint(1, 4)))
-                return new_authority
-            return authority
-
-        # Apply the corruption function to the column.
-        df[column_name] = df[column_name].apply(corrupt_authority)
-        return df
+        rng = np.random.default_rng() if rng is None else rng
+        rows = Corrupt.select_rows(len(df), corruption_level, rng)
+        new_authorities, types = Corrupt.corrupt_authorities(df[column_name].to_numpy(dtype=object)[rows], rng)
+        return Corrupt.replace_values(df, column_name, rows, new_authorities, log, types)
 
     @staticmethod
-    def introduce_drivernum_corruption(df, column_name, corruption_level):
+    def corrupt_authorities(authorities, rng):
+        """ Function that corrupts every issuing authority of an array, and returns the corrupted authorities with their corruption type."""
+        # Replace the authority with a random word that is 1 to 4 characters long.
+        characters = Corrupt.EDIT_CHARACTERS
+        lengths = rng.integers(1, 5, size=len(authorities))
+        picked = characters[rng.integers(0, len(characters), size=(len(authorities), 4))]
+        new_authorities = picked[:, 0]
+        for position in range(1, 4):
+            new_authorities = new_authorities + np.where(lengths > position, picked[:, position], '')
+        return new_authorities, 'random'
+
+    @staticmethod
+    def introduce_drivernum_corruption(df, column_name, corruption_level, rng=None, log=None):
         """ Function that specifies the driver number column to be corrupted, as well as the corruption level (1 is Fully Corrupted)."""
-        def corrupt_drivernum(driver_num):
-            """ Function that iterates through every row in the column containing the license number to introduce corruption by adding/deleting/replacing up to 3 characters."""
-            if random.random() < corruption_level:
-                num_corruptions = random.randint(1, 3)  # Number of corruptions (1 to 3 digits).
-                for _ in range(num_corruptions):
-                    action = random.random()
-                    if action < 0.33:  # 33% chance of adding a digit/letter.
-                        driver_num += random.choice(string.ascii_uppercase + string.digits)
-                    elif action < 0.66:  # 33% chance of deleting a digit/letter.
-                        if len(driver_num) > 0:
-                            index_to_delete = random.randint(0, len(driver_num) - 1)
-                            driver_num = driver_num[:index_to_delete] + driver_num[index_to_delete + 1:]
-                    else:  # 33% chance of replacing a digit/letter.
-                        if len(driver_num) > 0:
-                            index_to_replace = random.randint(0, len(driver_num) - 1)
-                            driver_num = driver_num[:index_to_replace] + random.choice(string.ascii_uppercase + string.digits) + driver_num[index_to_replace + 1:]
-            return driver_num
-        
-        # Apply the corruption function to the column.
-        df[column_name] = df[column_name].apply(corrupt_drivernum)
-        return df
+        rng = np.random.default_rng() if rng is None else rng
+        rows = Corrupt.select_rows(len(df), corruption_level, rng)
+        corrupted_nums, types = Corrupt.corrupt_drivernums(df[column_name].to_numpy(dtype=object)[rows], rng)
+        return Corrupt.replace_values(df, column_name, rows, corrupted_nums, log, types)
+
+    @staticmethod
+    def corrupt_drivernums(driver_nums, rng):
+        """ Function that corrupts every driver number of an array, and returns the corrupted driver numbers with their corruption type."""
+        # Draw all the random choices up front: 1 to 3 corruptions per number, each adding/deleting/replacing a digit/letter.
+        characters = Corrupt.EDIT_CHARACTERS
+        num_corruptions = rng.integers(1, 4, size=len(driver_nums))
+        actions = rng.random((len(driver_nums), 3))
+        index_fractions = rng.random((len(driver_nums), 3))
+        new_characters = characters[rng.integers(0, len(characters), size=(len(driver_nums), 3))]
+
+        corrupted_nums = []
+        for i, driver_num in enumerate(driver_nums):
+            for j in range(num_corruptions[i]):
+                index = int(index_fractions[i, j] * len(driver_num))
+                if actions[i, j] < 0.33:  # 33% chance of adding a digit/letter.
+                    driver_num += new_characters[i, j]
+                elif actions[i, j] < 0.66:  # 33% chance of deleting a digit/letter.
+                    if len(driver_num) > 0:
+                        driver_num = driver_num[:index] + driver_num[index + 1:]
+                else:  # 33% chance of replacing a digit/letter.
+                    if len(driver_num) > 0:
+                        driver_num = driver_num[:index] + new_characters[i, j] + driver_num[index + 1:]
+            corrupted_nums.append(driver_num)
+        return corrupted_nums, 'edit'
 
     @staticmethod
-    def introduce_address_corruption(df, column_name, corruption_level):
+    def introduce_address_corruption(df, column_name, corruption_level, rng=None, log=None):
         """ Function that specifies the address column to be corrupted, as well as the corruption level (1 is Fully Corrupted)."""
-        def corrupt_address(address):
-            """ Function that iterates through every row in the column containing the address and corrupts it by deleting some of the components, like city name or post code."""
-            if random.random() < corruption_level:
-                components = address.split(', ')    # Split address into separate components. 
-                num_components = len(components)
-                remaining_components = random.randint(0, num_components)  # Determine how many components remain.
-                if remaining_components == 0:
-                    return ''  # Return an empty string if no component remains.
-                else:
-                    return ', '.join(components[:remaining_components])
-            return address
-        
-        # Apply the corruption function to the column.
-        df[column_name] = df[column_name].apply(corrupt_address)
-        return df
-        
+        rng = np.random.default_rng() if rng is None else rng
+        rows = Corrupt.select_rows(len(df), corruption_level, rng)
+        corrupted_addresses, types = Corrupt.corrupt_addresses(df[column_name].to_numpy(dtype=object)[rows], rng)
+        return Corrupt.replace_values(df, column_name, rows, corrupted_addresses, log, types)
+
+    @staticmethod
+    def corrupt_addresses(addresses, rng):
+        """ Function that corrupts every address of an array, and returns the corrupted addresses with their corruption type."""
+        # Split the addresses into components and keep a random number of them, from none (an empty string) to all.
+        components = pd.Series(addresses, dtype=object).str.split(', ')
+        remaining_components = np.floor(rng.random(len(addresses)) * (components.str.len().to_numpy() + 1)).astype('int64')
+        return [', '.join(parts[:remaining]) for parts, remaining in zip(components, remaining_components)], 'truncate'
+
+    @staticmethod
+    def corrupt_values(kind, values, rng, pool=None):
+        """ Function that corrupts every value of an array with the corruption meant for a kind of column other than names, whose characters are
+        corrupted one at a time, and returns the corrupted values with their corruption types."""
+        if kind == 'date':
+            return Corrupt.corrupt_dates(values, rng)
+        if kind == 'gender':
+            return Corrupt.corrupt_genders(values, rng, pool)
+        if kind == 'authority':
+            return Corrupt.corrupt_authorities(values, rng)
+        if kind == 'drivernum':
+            return Corrupt.corrupt_drivernums(values, rng)
+        return Corrupt.corrupt_addresses(values, rng)
+
+    @staticmethod
+    def introduce_column_corruption(df, column_name, corruption_level, pool=None, rng=None, log=None):
+        """ Function that corrupts one column of the license dataframe with the corruption function meant for it."""
+        kind = Corrupt.COLUMNS[column_name]
+        if kind == 'name':
+            return Corrupt.introduce_name_corruption(df, column_name, corruption_level, rng, log)
+        if kind == 'date':
+            return Corrupt.introduce_date_corruption(df, column_name, corruption_level, rng, log)
+        if kind == 'gender':
+            return Corrupt.introduce_gender_corruption(df, column_name, corruption_level, rng, log, pool)
+        if kind == 'authority':
+            return Corrupt.introduce_authority_corruption(df, column_name, corruption_level, rng, log)
+        if kind == 'drivernum':
+            return Corrupt.introduce_drivernum_corruption(df, column_name, corruption_level, rng, log)
+        return Corrupt.introduce_address_corruption(df, column_name, corruption_level, rng, log)
+
     @staticmethod
-    def introduce_corruptions(df, corruption_level):
-        """ Function that calls all the previous corruption methods together for all columns in the license dataframe, and lets you specify one corruption level for all columns."""
+    def introduce_corruptions(df, corruption_level, pool=None, rng=None, column_levels=None, log=None):
+        """ Function that calls all the previous corruption methods together for all columns in the license dataframe, and lets you specify one corruption level for all columns.
+        column_levels optionally maps column names to their own corruption level, overriding corruption_level for those columns."""
+        rng = np.random.default_rng() if rng is None else rng
+        levels = {column: corruption_level for column in df.columns}
+        levels.update(column_levels or {})
+
         # Call the appropriate corruption function for each column.
-        df = Corrupt.introduce_name_corruption(df, 'First Name', corruption_level)
-        df = Corrupt.introduce_name_corruption(df, 'Last Name', corruption_level)
-        df = Corrupt.introduce_date_corruption(df, 'Date of Birth', corruption_level)
-        df = Corrupt.introduce_name_corruption(df, 'Place of Birth', corruption_level)
-        df = Corrupt.introduce_gender_corruption(df, 'Gender', corruption_level)
-        df = Corrupt.introduce_date_corruption(df, 'Date of Issue', corruption_level)
-        df = Corrupt.introduce_date_corruption(df, 'Date of Expiry', corruption_level)
-        df = Corrupt.introduce_authority_corruption(df, 'Issuing Authority', corruption_level)
-        df = Corrupt.introduce_drivernum_corruption(df, 'License Number', corruption_level)
-        df = Corrupt.introduce_address_corruption(df, 'Address', corruption_level)
+        for column_name in Corrupt.COLUMNS:
+            df = Corrupt.introduce_column_corruption(df, column_name, levels[column_name], pool, rng, log)
         return df
     
+@Profiler.instrument
 class Validate:
     """This is a class containing functions to validate license data that may have been corrupted. Note that for attributes dependent on prior attributes, like
-    License Number, if the prior attributes are corrupt the dependent attribute will also be marked as corrupt."""
+    License Number, if the prior attributes are corrupt the dependent attribute will also be marked as corrupt. Every column is checked at once with pandas
+    string and date operations rather than row by row."""
+    # The other columns each column is checked against, so changing one of them means the column has to be validated again.
+    DEPENDENCIES = {'Date of Issue': ['Date of Birth'], 'Date of Expiry': ['Date of Issue'],
+                    'License Number': ['First Name', 'Last Name', 'Gender', 'Date of Birth']}
+
     @staticmethod
-    def validate_name(df, column_name):
-        """ Function that specifies a name column in a database to be validated."""
-        # Create a new column for corruption status.
+    def insert_flags(df, column_name, flags):
+        """ Function that inserts the corruption status column for a column, marking corruption as 1 wherever flags is True.
+        The column is uint8 if the validated column is compact, and int64 otherwise. If the column was already validated, its status column is replaced."""
+        # Create a new column for corruption status, inserted next to the specified column.
         new_column_name = f"{column_name} Corruption"
+        dtype = 'uint8' if Compact.is_compact(df[column_name]) else 'int64'
+        flags = np.asarray(flags, dtype=bool)
+        if Profiler.enabled:
+            Profiler.count('cells_flagged', int(flags.sum()))
+        if new_column_name in df.columns:
+            df[new_column_name] = flags.astype(dtype)
+            return df
         column_index = df.columns.get_loc(column_name)
-        df.insert(column_index + 1, new_column_name, 0)  # Inserting next to the specified column.
-        
-        # Define a regular expression pattern to match only letters.
-        pattern = re.compile(r'^[a-zA-Z]+$')
-        
-        # Iterate through each row to validate the names.
-        for index, row in df.iterrows():
-            name = str(row[column_name])  # Ensure it's treated as a string.
-            if not name or not pattern.match(name):
-                df.at[index, new_column_name] = 1  # Marking corruption as 1 if criteria not met.
-                
+        df.insert(column_index + 1, new_column_name, flags.astype(dtype))
         return df
+
+    @staticmethod
+    def affected_columns(changed_columns):
+        """ Function that returns the columns whose corruption status can change when the given columns change: the columns themselves and
+        every column checked against one of them, in the order Validate.validate checks them."""
+        changed_columns = set(changed_columns)
+        return [column for column in Corrupt.COLUMNS
+                if column in changed_columns or changed_columns.intersection(Validate.DEPENDENCIES.get(column, []))]
+
+    @staticmethod
+    def per_value(values, function):
+        """ Function that applies a function on a series of distinct values only once per distinct value, and spreads the results back to every row."""
+        codes, uniques = Compact.factorize(values)
+        return np.asarray(function(pd.Series(uniques, dtype=object)))[codes]
+
+    @staticmethod
+    def date_days(df, column_name, dates=None):
+        """ Function that returns a date column as int32 day numbers, with DateCodec.MISSING wherever the date format is invalid.
+        If a dates dictionary is given, each column is parsed only once and the result is shared with every other validator given the same dictionary."""
+        if dates is None:
+            return DateCodec.parse(df[column_name])
+        if column_name not in dates:
+            dates[column_name] = DateCodec.parse(df[column_name])
+        return dates[column_name]
+
+    @staticmethod
+    def validate_name(df, column_name):
+        """ Function that specifies a name column in a database to be validated."""
+        # Define a regular expression pattern to match only letters.
+        flags = Validate.per_value(df[column_name], lambda names: ~names.str.match(r'^[a-zA-Z]+$'))
+        return Validate.insert_flags(df, column_name, flags)
         
     @staticmethod
-    def validate_birthdate(df, column_name):
-        """ Function that specifies the date of birth column to be validated as per the constrains specified in the License class."""
-        # Create a new column for corruption status.
-        new_column_name = f"{column_name} Corruption"
-        column_index = df.columns.get_loc(column_name)
-        df.insert(column_index + 1, new_column_name, 0)  # Inserting next to the specified column.
-       
+    def validate_birthdate(df, column_name, dates=None, today=None):
+        """ Function that specifies the date of birth column to be validated as per the constrains specified in the License class.
+        The latest date of birth is worked out from today, a date that defaults to the current date, as in License.generate_batch."""
         # Define constraints for date validation.
-        today = datetime.today()
-        earliest_dob = datetime(1950, 1, 1)
-        latest_dob = today - timedelta(days=17 * 365)
-        
-        # Iterate through each row to validate the dates.
-        for index, row in df.iterrows():
-            try:
-                dob = datetime.strptime(str(row[column_name]), '%d.%m.%Y')
-                if not earliest_dob <= dob <= latest_dob:
-                    df.at[index, new_column_name] = 1  # Marking corruption as 1 if criteria not met.
-            except ValueError:
-                df.at[index, new_column_name] = 1  # Marking corruption as 1 if date format is invalid.
-                
-        return df
+        earliest_dob = DateCodec.from_date(date(1950, 1, 1))
+        latest_dob = (DateCodec.today() if today is None else DateCodec.from_date(today)) - 17 * 365
+
+        # Invalid date formats are DateCodec.MISSING, which is before the earliest date and so marked as corrupt.
+        dob = Validate.date_days(df, column_name, dates)
+        flags = ~((earliest_dob <= dob) & (dob <= latest_dob))
+        return Validate.insert_flags(df, column_name, flags)
     
     @staticmethod
     def validate_birthplace(df, column_name):
         """ Function that specifies the place of birth column in a database to be validated."""
-        # Create a new column for corruption status.
-        new_column_name = f"{column_name} Corruption"
-        column_index = df.columns.get_loc(column_name)
-        df.insert(column_index + 1, new_column_name, 0)  # Inserting next to the specified column.
-        
-        # Define a regular expression pattern to match letters and spaces.
-        pattern = re.compile(r'^[a-zA-Z\s]+$')
-        
-        # Iterate through each row to validate the birthplaces.
-        for index, row in df.iterrows():
-            birthplace = str(row[column_name])  # Ensure it's treated as a string
-            
-            # Exclude empty strings and ensure the birthplace matches the pattern.
-            if not birthplace or not pattern.match(birthplace):
-                df.at[index, new_column_name] = 1  # Marking corruption as 1 if criteria not met.
-                
-        return df
+        # Define a regular expression pattern to match letters and spaces, which also excludes empty strings.
+        flags = Validate.per_value(df[column_name], lambda birthplaces: ~birthplaces.str.match(r'^[a-zA-Z\s]+$'))
+        return Validate.insert_flags(df, column_name, flags)
     
     @staticmethod
     def validate_gender(df, column_name):
         """ Function that specifies the gender column to be validated."""
-        # Create a new column for corruption status.
-        new_column_name = f"{column_name} Corruption"
-        column_index = df.columns.get_loc(column_name)
-        df.insert(column_index + 1, new_column_name, 0)  # Inserting next to the specified column.
-
         # Define allowed genders.
         allowed_genders = {'Male', 'Female'}
-
-        # Iterate through each row to validate the genders.
-        for index, row in df.iterrows():
-            gender = str(row[column_name])
-            if gender not in allowed_genders:
-                df.at[index, new_column_name] = 1  # Marking corruption as 1 if criteria not met.
-          
-        return df
+        flags = Validate.per_value(df[column_name], lambda genders: ~genders.isin(allowed_genders))
+        return Validate.insert_flags(df, column_name, flags)
 
     @staticmethod
-    def validate_issuedate(df, column_name, dob_column):
-        """ Function that specifies the date of issue column to be validated as per the constrains specified in the License class."""
-        # Create a new column for corruption status.
-        new_column_name = f"{column_name} Corruption"
-        column_index = df.columns.get_loc(column_name)
-        df.insert(column_index + 1, new_column_name, 0)  # Inserting next to the specified column.
-
-        # Iterate through each row to validate the dates.
-        for index, row in df.iterrows():
-            date_of_birth = row[dob_column]
-            try:
-                # Specify constraints based on date of birth.
-                dob = datetime.strptime(date_of_birth, '%d.%m.%Y')
-                earliest_issue = dob + timedelta(days=17*365)
-                latest_issue = datetime.today()
-
-                # Check date format.
-                date_of_issue = datetime.strptime(str(row[column_name]), '%d.%m.%Y')
-
-                if not (earliest_issue <= date_of_issue <= latest_issue):
-                    df.at[index, new_column_name] = 1  # Marking corruption as 1 if criteria not met.
-            except (ValueError, KeyError):
-                df.at[index, new_column_name] = 1  # Marking corruption as 1 if date format is invalid or missing.
-                
-        return df
+    def validate_issuedate(df, column_name, dob_column, dates=None, today=None):
+        """ Function that specifies the date of issue column to be validated as per the constrains specified in the License class.
+        Dates of issue after today, a date that defaults to the current date, are marked as corrupt."""
+        # A missing date of birth column marks every row as corrupt.
+        if dob_column not in df.columns:
+            return Validate.insert_flags(df, column_name, np.ones(len(df), dtype=bool))
+
+        # Specify constraints based on date of birth.
+        dob = Validate.date_days(df, dob_column, dates).astype('int64')
+        earliest_issue = dob + 17*365
+        latest_issue = DateCodec.today() if today is None else DateCodec.from_date(today)
+
+        # Check date format, where an invalid date of birth or date of issue is marked as corrupt.
+        date_of_issue = Validate.date_days(df, column_name, dates)
+        valid = (dob != DateCodec.MISSING) & (date_of_issue != DateCodec.MISSING)
+        flags = ~(valid & (earliest_issue <= date_of_issue) & (date_of_issue <= latest_issue))
+        return Validate.insert_flags(df, column_name, flags)
 
     @staticmethod
-    def validate_expirydate(df, column_name, issue_column):
+    def validate_expirydate(df, column_name, issue_column, dates=None):
         """ Function that specifies the date of expiry column to be validated as per the constrains specified in the License class."""
-        # Create a new column for corruption status.
-        new_column_name = f"{column_name} Corruption"
-        column_index = df.columns.get_loc(column_name)
-        df.insert(column_index + 1, new_column_name, 0)  # Inserting next to the specified column.
-
-        # Iterate through each row to validate the dates
-        for index, row in df.iterrows():
-            date_of_issue = row[issue_column]
-            try:
-                date_of_issue = datetime.strptime(date_of_issue, '%d.%m.%Y')
-                date_of_expiry = datetime.strptime(str(row[column_name]), '%d.%m.%Y')
-
-                expected_expiry = date_of_issue + timedelta(days=10*365)
-                if date_of_expiry != expected_expiry:
-                    df.at[index, new_column_name] = 1  # Marking corruption as 1 if criteria not met.
-            except (ValueError, KeyError):
-                df.at[index, new_column_name] = 1  # Marking corruption as 1 if date format is invalid or missing.
-                
-        return df
+        # A missing date of issue column marks every row as corrupt.
+        if issue_column not in df.columns:
+            return Validate.insert_flags(df, column_name, np.ones(len(df), dtype=bool))
 
+        date_of_issue = Validate.date_days(df, issue_column, dates).astype('int64')
+        date_of_expiry = Validate.date_days(df, column_name, dates)
+
+        # Check the expiry is 10 years after the date of issue, where an invalid date is marked as corrupt.
+        valid = (date_of_issue != DateCodec.MISSING) & (date_of_expiry != DateCodec.MISSING)
+        flags = ~(valid & (date_of_expiry == date_of_issue + 10*365))
+        return Validate.insert_flags(df, column_name, flags)
 
     @staticmethod
     def validate_authority(df, column_name):
         """ Function that specifies the issuing authority column to be validated to ensure it is "DA1"."""
-        # Create a new column for corruption status.
-        new_column_name = f"{column_name} Corruption"
-        column_index = df.columns.get_loc(column_name)
-        df.insert(column_index + 1, new_column_name, 0)  # Inserting next to the specified column.
-
-        # Iterate through each row to validate the issuing authority
-        for index, row in df.iterrows():
-            issuing_authority = str(row[column_name])  # Ensure it's treated as a string.
-            if issuing_authority != "DA1":
-                df.at[index, new_column_name] = 1  # Marking corruption as 1 if criteria not met.
-                
-        return df
+        flags = Validate.per_value(df[column_name], lambda authorities: authorities != "DA1")
+        return Validate.insert_flags(df, column_name, flags)
     
+    @staticmethod
+    def expected_driver_num_prefix(first_name, last_name, gender, date_of_birth):
+        """ Function that builds the first 14 characters of the expected driver numbers for whole columns, using the same formulae as the function in the class License.
+        Every part is worked out once per distinct name or date, and rows where the date of birth is too short or its month isn't a number get a missing value."""
+        def date_digits(dates, female):
+            """ Function that builds the decade, month, day and year digits for distinct dates of birth, with the month incremented by 50 if female."""
+            month = pd.to_numeric(dates.str[3:5], errors='coerce') + (50 if female else 0)
+            month_digit = month.astype('Int64').astype(str).str.zfill(2).where(month.notna())
+            return (dates.str[8] + month_digit + dates.str[:2].str.zfill(2) + dates.str[9]).to_numpy(dtype=object)
+
+        # Work out the date digits for both genders for every distinct date of birth.
+        dob_codes, dob_uniques = Compact.factorize(date_of_birth)
+        dob_uniques = pd.Series(dob_uniques, dtype=object)
+        is_female = Validate.per_value(gender, lambda genders: genders.str.lower() == 'female')
+        digits = np.where(is_female, date_digits(dob_uniques, True)[dob_codes], date_digits(dob_uniques, False)[dob_codes])
+        valid = pd.notna(digits)
+
+        last_name_digits = Validate.per_value(last_name, lambda names: names.str.upper().str.replace("MAC", "MC", regex=False).str.ljust(5, '9').str[:5])
+        first_initial = Validate.per_value(first_name, lambda names: names.str[0].str.upper() + '99')
+
+        expected = pd.Series(last_name_digits + np.where(valid, digits, '') + first_initial, index=last_name.index, dtype=object)
+        return expected.str[:14].where(valid)
+
     @staticmethod
     def validate_drivernum(df, column_name, first_name, last_name, gender, date_of_birth):
         """ Function that specifies the license number column to be validated as per the constrains specified in the License class."""
-        def generate_expected_driver_num(first_name, last_name, gender, date_of_birth):
-            """ Function that generates a driver number using the same formulae as the function in the class License."""
-            l_name = last_name.upper().replace("MAC", "MC").ljust(5, '9')[:5]
-            decade_digit = date_of_birth[8]
-            month_digit = str(int(date_of_birth[3:5])).zfill(2)
-            if gender.lower() == 'female':
-                month_digit = str(int(month_digit) + 50).zfill(2)
-            day_digit = date_of_birth[:2].zfill(2)
-            year_digit = date_of_birth[9]
-            first_initial = first_name[0].upper() + '99'
-            random_letters = ''.join(random.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZ', k=2))
-
-            return f'{l_name}{decade_digit}{month_digit}{day_digit}{year_digit}{first_initial}{random_letters}'
-        
-        # Create a new column for corruption status.
-        new_column_name = f"{column_name} Corruption"
-        column_index = df.columns.get_loc(column_name)
-        df.insert(column_index + 1, new_column_name, 0)  # Inserting next to the specified column.
-
-        # Define a pattern to ensure there are no special characters or lower case letters. 
-        letters_pattern = re.compile(r'^[A-Z]+$')
-
-        # Iterate through each row to validate the driver number by comparing it to what the generated driver number should be.
-        for index, row in df.iterrows():
-            expected_driver_num = generate_expected_driver_num(
-                row[first_name], row[last_name], row[gender], row[date_of_birth]
-            )
-            driver_num = str(row[column_name])  # Ensure it's treated as a string.
-            
-            if driver_num[:14] != expected_driver_num[:14] or not letters_pattern.match(driver_num[14:]):
-                df.at[index, new_column_name] = 1  # Marking corruption as 1 if criteria not met.
-                
-        return df
+        # Compare every license number to what the generated driver number should be.
+        expected_prefix = Validate.expected_driver_num_prefix(df[first_name], df[last_name], df[gender], df[date_of_birth])
+        driver_nums = df[column_name].astype(str)  # Ensure it's treated as a string.
+
+        # Ensure there are no special characters or lower case letters in the random letters after the first 14 characters.
+        matches_prefix = (driver_nums.str[:14] == expected_prefix).to_numpy()
+        flags = ~(matches_prefix & driver_nums.str.match(r'(?s).{14}[A-Z]+$').to_numpy())
+        return Validate.insert_flags(df, column_name, flags)
 
-    
     @staticmethod
     def validate_address(df, column_name):
         """ Function that specifies the address column to be validated as per the constrains specified in the License class."""   
-        # Create a new column for corruption status.
-        new_column_name = f"{column_name} Corruption"
-        column_index = df.columns.get_loc(column_name)
-        df.insert(column_index + 1, new_column_name, 0)  # Inserting next to the specified column.
-
-        # Define regex patterns for address components
-        street_pattern = re.compile(r'^\d{1,3}\s[A-Za-z]+\s[A-Za-z]+$')
-        city_pattern = re.compile(r'^[A-Za-z]+(?:\s[A-Za-z]+)?$')
-        postcode_pattern = re.compile(r'^[A-Za-z]{1,2}\d[A-Za-z0-9]?\s\d[A-Za-z]{2}$')
-        
-        # Iterate through each row to validate the address components.
-        for index, row in df.iterrows():
-            address = str(row[column_name])  # Ensure it's treated as a string.
-            address_components = address.split(', ') if address else []
-
-            # Check if all address components are present.
-            if len(address_components) != 3:
-                df.at[index, new_column_name] = 1  # Marking corruption as 1 if any component is missing
-                continue
-            
-            # Validate street address, city, and postcode formats.
-            street_address, city, postcode = address_components
-            
-            if not street_pattern.match(street_address) or not city_pattern.match(city) or not postcode_pattern.match(postcode):
-                df.at[index, new_column_name] = 1  # Marking corruption as 1 if any component format is invalid. 
-                
-        return df
+        # Validate that all 3 address components are present and that the street address, city, and postcode formats are valid, all with one pattern.
+        # None of the component patterns can match ', ', and each may end with a newline like a '$' at the end of a single component would allow.
+        street_pattern = r'\d{1,3}\s[A-Za-z]+\s[A-Za-z]+\n?'
+        city_pattern = r'[A-Za-z]+(?:\s[A-Za-z]+)?\n?'
+        postcode_pattern = r'[A-Za-z]{1,2}\d[A-Za-z0-9]?\s\d[A-Za-z]{2}\n?'
+        addresses = df[column_name].astype(str)  # Ensure it's treated as a string.
+        flags = ~addresses.str.match(rf'^{street_pattern}, {city_pattern}, {postcode_pattern}\Z')
+        return Validate.insert_flags(df, column_name, flags)
         
     @staticmethod
-    def validate(df):
-        """ Function that calls all the previous validation methods together for all columns in the license dataframe."""
-        # Call the appropriate corruption function for each column.
-        df = Validate.validate_name(df, 'First Name')
-        df = Validate.validate_name(df, 'Last Name')
-        df = Validate.validate_birthdate(df, 'Date of Birth')
-        df = Validate.validate_birthplace(df, 'Place of Birth')
-        df = Validate.validate_gender(df, 'Gender')
-        df = Validate.validate_issuedate(df, 'Date of Issue', 'Date of Birth')
-        df = Validate.validate_expirydate(df, 'Date of Expiry', 'Date of Issue')
-        df = Validate.validate_authority(df, 'Issuing Authority')
-        df = Validate.validate_drivernum(df, 'License Number', 'First Name', 'Last Name', 'Gender',  'Date of Birth')
-        df = Validate.validate_address(df, "Address")
+    def validate_column(df, column_name, dates=None, today=None):
+        """ Function that validates one column of the license dataframe with the validation function meant for it, with today passed on to the date checks."""
+        if column_name in ('First Name', 'Last Name'):
+            return Validate.validate_name(df, column_name)
+        if column_name == 'Date of Birth':
+            return Validate.validate_birthdate(df, column_name, dates, today)
+        if column_name == 'Place of Birth':
+            return Validate.validate_birthplace(df, column_name)
+        if column_name == 'Gender':
+            return Validate.validate_gender(df, column_name)
+        if column_name == 'Date of Issue':
+            return Validate.validate_issuedate(df, column_name, 'Date of Birth', dates, today)
+        if column_name == 'Date of Expiry':
+            return Validate.validate_expirydate(df, column_name, 'Date of Issue', dates)
+        if column_name == 'Issuing Authority':
+            return Validate.validate_authority(df, column_name)
+        if column_name == 'License Number':
+            return Validate.validate_drivernum(df, column_name, 'First Name', 'Last Name', 'Gender', 'Date of Birth')
+        return Validate.validate_address(df, column_name)
+
+    @staticmethod
+    def column_flags(df, column_name, dates=None, today=None):
+        """ Function that validates one column on a dataframe holding only that column and the columns it is checked against, which share their data with df,
+        and returns its corruption status column. This leaves df untouched, so several columns can be validated at the same time."""
+        needed = [column_name] + [column for column in Validate.DEPENDENCIES.get(column_name, []) if column in df.columns]
+        view = pd.DataFrame({column: df[column] for column in needed}, copy=False)
+        return Validate.validate_column(view, column_name, dates, today)[f"{column_name} Corruption"]
+
+    @staticmethod
+    def validate(df, columns=None, workers=None, today=None):
+        """ Function that calls all the previous validation methods together for all columns in the license dataframe.
+        If columns is given, only those columns are validated, and any status columns they already have are replaced.
+        today is the date the date checks are made on, by default the current date.
+        With workers, columns are validated by that many threads at once, each column as soon as the columns it is checked against are done,
+        so the parsed dates can be shared. The threads read the same column data, and the status columns end up where they would otherwise."""
+        # Parse each date column only once and share it between the date validators.
+        dates = {}
+        columns = [column for column in Corrupt.COLUMNS if column in (Corrupt.COLUMNS if columns is None else columns)]
+        if not workers or workers <= 1 or len(columns) <= 1:
+            for column in columns:
+                df = Validate.validate_column(df, column, dates, today)
+            return df
+
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+        # Start every column whose dependencies are done, and start more each time one finishes.
+        waiting = {column: {dependency for dependency in Validate.DEPENDENCIES.get(column, []) if dependency in columns} for column in columns}
+        flags, running = {}, {}
+        # The workers count their flagged cells towards this call too, as the validators would if they ran here.
+        column_flags = Profiler.bind(Validate.column_flags)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while waiting or running:
+                for column in [column for column, dependencies in waiting.items() if dependencies.issubset(flags)]:
+                    running[executor.submit(column_flags, df, column, dates, today)] = column
+                    del waiting[column]
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    flags[running.pop(future)] = future.result()
+
+        # Insert the status columns one by one in the same way as the validators would.
+        for column in columns:
+            status_column = f"{column} Corruption"
+            if status_column in df.columns:
+                df[status_column] = flags[column].to_numpy()
+            else:
+                df.insert(df.columns.get_loc(column) + 1, status_column, flags[column].to_numpy())
         return df
-    
+
+class StatsSummary:
+    """This is a class holding the corruption counts of a validated dataset, worked out in one pass over its corruption status columns.
+Summaries of separate chunks of a dataset can be merged in any grouping, giving the same numbers as a summary of the whole dataset."""
+    def __init__(self, total_rows=0, total_cells=0, corrupt_cells=0, attribute_counts=None, row_counts=None):
+        """ Function to set up a summary from its counts. row_counts[k] is the number of rows with exactly k corrupt cells."""
+        self.total_rows = total_rows
+        self.total_cells = total_cells
+        self.corrupt_cells = corrupt_cells
+        self.attribute_counts = dict(attribute_counts) if attribute_counts is not None else {}
+        self.row_counts = np.asarray(row_counts if row_counts is not None else [], dtype='int64')
+
+    @staticmethod
+    def from_dataframe(df):
+        """ Function that summarises a validated dataframe in one pass over the columns that have 'Corruption' in their name."""
+        corruption_columns = [col for col in df.columns if 'Corruption' in col]
+        flags = df[corruption_columns].to_numpy(dtype='int64') != 0
+        corrupt_per_row = flags.sum(axis=1)
+
+        return StatsSummary(
+            total_rows=len(df),
+            total_cells=df.shape[0] * df.shape[1],
+            corrupt_cells=int(corrupt_per_row.sum()),
+            attribute_counts={col.replace(' Corruption', ''): int(count) for col, count in zip(corruption_columns, flags.sum(axis=0))},
+            row_counts=np.bincount(corrupt_per_row, minlength=len(corruption_columns) + 1)
+        )
+
+    def merge(self, other):
+        """ Function that returns a new summary covering the rows of both summaries."""
+        # Pad the row counts to the same length before adding them.
+        length = max(len(self.row_counts), len(other.row_counts))
+        row_counts = np.zeros(length, dtype='int64')
+        row_counts[:len(self.row_counts)] += self.row_counts
+        row_counts[:len(other.row_counts)] += other.row_counts
+
+        attribute_counts = dict(self.attribute_counts)
+        for attribute, count in other.attribute_counts.items():
+            attribute_counts[attribute] = attribute_counts.get(attribute, 0) + count
+
+        return StatsSummary(self.total_rows + other.total_rows, self.total_cells + other.total_cells,
+                            self.corrupt_cells + other.corrupt_cells, attribute_counts, row_counts)
+
+    def __add__(self, other):
+        return self.merge(other)
+
+    def is_corrupt(self):
+        """ Function that returns 1 if any cell is corrupt, or 0 otherwise, like Stats.is_corrupt."""
+        return 1 if self.corrupt_cells > 0 else 0
+
+    def corrupt_percent(self):
+        """ Function that returns the corrupt cells over the total cells, like Stats.corrupt_percent."""
+        return self.corrupt_cells / self.total_cells if self.total_cells else 0.0
+
+    def attribute_corruption(self):
+        """ Function that returns which attributes contain corruption (1) or dont (0), like Stats.attribute_corruption."""
+        return {attribute: 1 if count > 0 else 0 for attribute, count in self.attribute_counts.items()}
+
+    def corrupt_rows(self):
+        """ Function that returns the number of rows with at least one corrupt cell."""
+        return int(self.row_counts[1:].sum())
+
+    def registry_row(self, dataset, counts=False):
+        """ Function that returns the numbers for a dataset in the dataset_registry table. By default these match the values the
+        Stats functions give, and with counts=True the corrupt fields and attribute columns hold counts instead of 0/1."""
+        attributes = self.attribute_counts if counts else self.attribute_corruption()
+        row = {
+            'Dataset': dataset,
+            'Total_Entries': self.total_rows,
+            'Corrupt_Fields': self.corrupt_cells if counts else self.is_corrupt(),
+            'Corruption_Percentage': self.corrupt_percent()
+        }
+        row.update({f"{attribute} Corruption": value for attribute, value in attributes.items()})
+        return row
+
+@Profiler.instrument
 class Stats:
     """This is a class containing functions to describe the previously generated license data."""
+    @staticmethod
+    def summarise(df):
+        """ Function that describes a validated dataset in a single pass, returning a StatsSummary that can be merged with the summaries of other chunks."""
+        return StatsSummary.from_dataframe(df)
+
     @staticmethod
     def is_corrupt(df):
         """ Function that checks a dataset to see if it contains any corruption"""
-        # List columns that have 'Corruption' in their name.
-        corruption_columns = [col for col in df.columns if 'Corruption' in col]
-
-        # Iterate through the corruption status columns to check for any '1's.
-        for col in corruption_columns:
-            if 1 in df[col].values:
-                return 1  # If any '1' is found, return True indicating corruption.
-        
-        return 0  # If no '1' is found in any column, return False indicating no corruption.
+        return Stats.summarise(df).is_corrupt()
     
     @staticmethod
     def corrupt_percent(df):
         """ Function that checks a dataset to see what percentage of rows contain corruption."""
-        # List columns that have 'Corruption' in their name.
-        corruption_columns = [col for col in df.columns if 'Corruption' in col]
-    
-        # Count total corrupt cells.
-        total_corrupt_cells = df[corruption_columns].sum().sum()
-
-        # Calculate the total number of cells in the DataFrame
-        total_cells = df.shape[0] * df.shape[1]
-
-        # Calculate corrupt percentage based on total corrupt cells over total cells
-        corrupt_percentage = (total_corrupt_cells / total_cells)
-
-        return corrupt_percentage
+        # Corrupt percentage is based on total corrupt cells over total cells, including the corruption status columns.
+        return Stats.summarise(df).corrupt_percent()
         
     @staticmethod
     def attribute_corruption(df):
         """ Function that returns which attributes in a dataset contain corruption or dont."""
-        # Find columns that have 'corruption' in their name
-        corruption_columns = [col for col in df.columns if 'Corruption' in col]
+        return Stats.summarise(df).attribute_corruption()
+
+    @staticmethod
+    def sample_size(error=0.01, confidence=0.95):
+        """ Function that returns how many sampled rows are needed for a rate to be within error of the true rate with the given confidence,
+        whatever the rate is. Smaller datasets need fewer, as Stats.estimate takes their size into account."""
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        # Rates of 0.5 vary the most, so a sample big enough for them is big enough for any rate.
+        return int(np.ceil(z ** 2 * 0.25 / error ** 2))
+
+    @staticmethod
+    def sample(data, size, by=None, rng=None):
+        """ Function that draws a uniform sample of size rows from a dataframe or a stream of dataframes, such as the batches from License.iter_batches,
+        without keeping more than one batch and the sample in memory. If by names a column, such as 'Dataset', size rows are drawn from each of its values.
+        Returns the sample and the number of rows each value had, by value (or under 'All' without by)."""
+        rng = np.random.default_rng() if rng is None else rng
+        batches = [data] if isinstance(data, pd.DataFrame) else data
 
-        # Dictionary to store attribute-wise corruption status
-        attribute_corruption = {}
+        # Give every row a random priority and keep the size lowest of each group, which is a uniform sample of the rows seen so far.
+        kept, priorities, populations = None, np.empty(0), {}
+        for batch in batches:
+            groups = batch[by] if by is not None and by in batch.columns else pd.Series('All', index=batch.index)
+            for name, count in groups.value_counts(sort=False, dropna=False).items():
+                populations[name] = populations.get(name, 0) + int(count)
+            candidates = batch if kept is None else pd.concat([kept, batch])
+            priorities = np.concatenate([priorities, rng.random(len(batch))])
+            candidate_groups = groups if kept is None else pd.concat([kept_groups, groups])
+            codes = pd.factorize(candidate_groups, use_na_sentinel=False)[0]
+            order = np.lexsort((priorities, codes))
+            ranks = np.arange(len(order)) - np.searchsorted(codes[order], codes[order])
+            chosen = np.sort(order[ranks < size])
+            kept, kept_groups, priorities = candidates.iloc[chosen], candidate_groups.iloc[chosen], priorities[chosen]
+        return (kept if kept is not None else pd.DataFrame()), populations
 
-        # Check each attribute column for corruption.
-        for col in corruption_columns:
-            attribute = col.replace(' Corruption', '')  # Remove 'corruption' from column name.
-            # Check if any corruption exists in the attribute column.
-            if 1 in df[col].values:
-                attribute_corruption[attribute] = 1  # Corruption exists in this attribute.
+    @staticmethod
+    def estimate(data, error=0.01, confidence=0.95, by='Dataset', rng=None):
+        """ Function that estimates the corruption percentage and the share of rows corrupted in each attribute from a sample, instead of validating
+        every row. The data is a dataframe or a stream of dataframes, validated or not, and only the sampled rows are validated. With the default sample
+        size from Stats.sample_size every estimate is within error of the true value with the given confidence. Datasets are sampled and estimated
+        separately if the by column is present. Returns a dataframe with the estimate and its confidence interval for every dataset and measure."""
+        size = Stats.sample_size(error, confidence)
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        sample, populations = Stats.sample(data, size, by, rng)
+
+        results = {}
+        for name, population in populations.items():
+            rows = sample if by is None or by not in sample.columns else sample[sample[by].isna() if pd.isna(name) else sample[by] == name]
+            rows = Validate.validate(rows[[col for col in Corrupt.COLUMNS if col in rows.columns]])
+            corruption_columns = [col for col in rows.columns if 'Corruption' in col]
+            flags = rows[corruption_columns].to_numpy(dtype='int64') != 0
+            n = len(rows)
+            # The finite population correction shrinks the intervals as the sample covers more of the dataset, down to none for the whole dataset.
+            fpc = np.sqrt((population - n) / (population - 1)) if population > 1 else 0.0
+
+            # The corruption percentage is a mean over rows of the share of their cells that are corrupt, as in Stats.corrupt_percent.
+            shares = flags.sum(axis=1) / rows.shape[1]
+            mean = shares.mean() if n else 0.0
+            margin = z * shares.std(ddof=1) / np.sqrt(n) * fpc if n > 1 else 0.0
+            results[(name, 'Corruption Percentage')] = (mean, max(mean - margin, 0.0), min(mean + margin, 1.0), n, population)
+
+            # Attribute rates are proportions, so they use Wilson intervals, which stay sensible for rates near 0 or 1.
+            for col, count in zip(corruption_columns, flags.sum(axis=0)):
+                rate = count / n if n else 0.0
+                effective = n / fpc ** 2 if fpc > 0 else np.inf
+                if np.isinf(effective):
+                    lower = upper = rate
+                else:
+                    centre = (rate + z ** 2 / (2 * effective)) / (1 + z ** 2 / effective)
+                    half = z * np.sqrt(rate * (1 - rate) / effective + z ** 2 / (4 * effective ** 2)) / (1 + z ** 2 / effective)
+                    lower, upper = max(centre - half, 0.0), min(centre + half, 1.0)
+                results[(name, col)] = (rate, lower, upper, n, population)
+
+        index = pd.MultiIndex.from_tuples(list(results), names=['Dataset', 'Measure'])
+        return pd.DataFrame(list(results.values()), index=index, columns=['Estimate', 'Lower', 'Upper', 'Sample', 'Rows'])
+
+
+class Scenarios:
+    """This is a class to derive scenario datasets from one validated base dataset. Each variant is a shallow copy of the base in which only the columns
+it targets are corrupted, so every other column is shared with the base instead of copied, and only the status columns that can change are validated again."""
+    # The scenarios of the license_df_mySQL_v2 notebook, as the corruption level for every column and the levels of single columns.
+    PRESETS = {
+        'normal_dataset': (0, {}),
+        'all_corrupt_dataset': (1, {}),
+        'some_corrupt_dataset': (0.2, {}),
+        'only_lnum_corrupt_dataset': (0, {'License Number': 1}),
+        'only_names_corrupt_dataset': (0, {'First Name': 1, 'Last Name': 1}),
+        'only_dates_corrupt_dataset': (0, {'Date of Birth': 1, 'Date of Issue': 1, 'Date of Expiry': 1})
+    }
+
+    def __init__(self, base, pool=None, rng=None):
+        """ Function to set up the variants of a base dataset from License, which is validated once here. The caller's dataframe is left unchanged."""
+        self.base = Validate.validate(base.copy(deep=False))
+        self.pool = pool
+        self.rng = np.random.default_rng() if rng is None else rng
+
+    def variant(self, corruption_level=0, column_levels=None, log=None):
+        """ Function that returns a validated variant of the base dataset, with every column corrupted at corruption_level and column_levels optionally
+        mapping column names to their own level. Columns with a level of 0 aren't touched, and if a CorruptionLog is given the corruption is recorded in it."""
+        levels = {column: corruption_level for column in Corrupt.COLUMNS}
+        levels.update(column_levels or {})
+        corrupted_columns = [column for column in Corrupt.COLUMNS if levels[column] > 0]
+
+        # Corrupt a shallow copy, where every corrupted column is replaced by a new array and the rest keep pointing at the base.
+        df = self.base.copy(deep=False)
+        for column in corrupted_columns:
+            df = Corrupt.introduce_column_corruption(df, column, levels[column], self.pool, self.rng, log)
+        return Validate.validate(df, Validate.affected_columns(corrupted_columns))
+
+    def variants(self, scenarios=None):
+        """ Function that returns a dictionary of validated variants by name, from a dictionary of (corruption level, column levels) pairs by name,
+        which defaults to Scenarios.PRESETS."""
+        scenarios = Scenarios.PRESETS if scenarios is None else scenarios
+        return {name: self.variant(corruption_level, column_levels) for name, (corruption_level, column_levels) in scenarios.items()}
+
+class RowRandom:
+    """This is a class to draw random numbers for a set of rows, where the numbers of each row only depend on the seed, the row's position and how many
+draws came before, not on which other rows are drawn for. It has the integers and random functions of a numpy Generator that License.generate_batch
+and ValuePool.draw use, for sizes of one value per row, so any rows of a dataset can be generated on their own and still match the full dataset."""
+    def __init__(self, seed, rows):
+        """ Function to set up the random numbers of the rows at the given positions, for a seed from 0 up."""
+        self.seed = np.random.SeedSequence(seed).generate_state(1, np.uint64)[0]
+        self.rows = RowRandom.mix(np.asarray(rows, dtype=np.uint64) ^ self.seed)
+        self.draws = 0
+
+    @staticmethod
+    def mix(values):
+        """ Function that scrambles an array of uint64 values with the splitmix64 finaliser, so nearby inputs give unrelated outputs."""
+        values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return values ^ (values >> np.uint64(31))
+
+    def random(self, size=None):
+        """ Function that returns floats in [0, 1), one per row, or a 2D array with one row of values per row for a (rows, k) size."""
+        shape = (len(self.rows),) if size is None else tuple(np.atleast_1d(size))
+        if shape[0] != len(self.rows):
+            raise ValueError(f"RowRandom draws one value per row, so the size must start with {len(self.rows)}, not {shape[0]}.")
+
+        # Every column of a draw is its own stream, mixed with the row, and the top 53 bits become the float.
+        width = int(np.prod(shape[1:], dtype='int64'))
+        streams = RowRandom.mix(np.arange(self.draws, self.draws + width, dtype=np.uint64) + np.uint64(1))
+        self.draws += width
+        values = RowRandom.mix(self.rows[:, None] ^ streams[None, :])
+        return ((values >> np.uint64(11)).astype(np.float64) * 2.0 ** -53).reshape(shape)
+
+    def integers(self, low, high=None, size=None, dtype=np.int64):
+        """ Function that returns integers from low up to but not including high, like numpy's Generator.integers, one per row."""
+        low, high = (0, low) if high is None else (low, high)
+        return (low + np.floor(self.random(size) * (high - low))).astype(dtype)
+
+class VirtualDataset:
+    """This is a class for a synthetic license dataset that is never stored, defined only by its seed, size and corruption levels. Any rows of it are
+generated when asked for, on their own, so a slice far into a huge dataset or a random sample costs about as much as the rows asked for.
+Both the clean rows and their corruption are drawn per row with RowRandom, and pages of page_size rows are only a way of going through the dataset."""
+    # Characters of a name that can be corrupted, as every row draws the same number of values for a name however long it is.
+    NAME_LENGTH = 64
+
+    def __init__(self, size, seed=0, corruption_level=0, column_levels=None, validated=False, compact=False, pool=None, page_size=1000, as_of=None):
+        """ Function to define a virtual dataset of size rows. The text values come from a ValuePool, which has to be the same pool, with refresh_every unset,
+        every time rows are generated for the rows to come out the same. By default it is the pool of the seed from ValuePool.for_locale, built when rows are
+        first asked for and shared by every dataset with the same seed. Rows are validated if validated is True.
+        The dates are generated and validated as of the as_of date, which defaults to the current date and is kept in self.as_of, so the same definition
+        gives the same rows on any day."""
+        if pool is not None and pool.refresh_every is not None:
+            raise ValueError("A VirtualDataset's pool can't be refreshed, or the same rows would get different values.")
+        self.size = size
+        self.seed = seed
+        self.levels = {column: corruption_level for column in Corrupt.COLUMNS}
+        self.levels.update(column_levels or {})
+        self.validated = validated
+        self.compact = compact
+        self.pool = pool
+        self.page_size = page_size
+        self.as_of = date.today() if as_of is None else as_of
+
+    def __len__(self):
+        return self.size
+
+    def corrupted(self):
+        """ Function that returns whether any column of the dataset is corrupted."""
+        return any(level > 0 for level in self.levels.values())
+
+    def value_pool(self):
+        """ Function that returns the pool the rows are drawn from, getting the shared pool of the seed on first use if none was given."""
+        if self.pool is None:
+            self.pool = ValuePool.for_locale(seed=self.seed)
+        return self.pool
+
+    def clean_rows(self, positions):
+        """ Function that generates the clean rows at the given positions, indexed by their positions."""
+        positions = np.asarray(positions, dtype='int64')
+        df = License.generate_batch(len(positions), rng=RowRandom(self.seed, positions), pool=self.value_pool(), today=self.as_of)
+        df.index = pd.Index(positions)
+        return df
+
+    def corrupt_rows(self, df):
+        """ Function that corrupts clean rows indexed by their positions with the kinds of corruption of Corrupt. Every column of a row draws one value
+        to decide whether it is corrupted, and the rows that are draw the values of their edit, each from a RowRandom of the seed and the column,
+        so a row is corrupted the same way whichever rows it is generated with."""
+        positions = df.index.to_numpy(dtype='int64')
+        for code, (column_name, kind) in enumerate(Corrupt.COLUMNS.items()):
+            level = self.levels[column_name]
+            if level <= 0:
+                continue
+            values = df[column_name].to_numpy(dtype=object)
+            decide = RowRandom([self.seed, code, 0], positions)
+            if kind == 'name':
+                # Every character is corrupted with probability level, so draw one value per character, and a new character for it, up to NAME_LENGTH.
+                lengths = np.fromiter(map(len, values), dtype='int64', count=len(values))
+                picked = (decide.random((len(positions), VirtualDataset.NAME_LENGTH)) < level) & \
+                    (np.arange(VirtualDataset.NAME_LENGTH) < lengths[:, None])
+                new_characters = Corrupt.NAME_CHARACTERS[decide.integers(0, len(Corrupt.NAME_CHARACTERS), size=(len(positions), VirtualDataset.NAME_LENGTH))]
+                rows, offsets = np.nonzero(picked)
+                rows, corrupted_values = Corrupt.replace_characters(values, rows, offsets, new_characters[picked])
             else:
-                attribute_corruption[attribute] = 0  # No corruption in this attribute.
-        
-        return attribute_corruption
+                # Only the rows that are corrupted draw their edit, from a second RowRandom for the column.
+                rows = np.flatnonzero(decide.random() < level)
+                edit = RowRandom([self.seed, code, 1], positions[rows])
+                corrupted_values, _ = Corrupt.corrupt_values(kind, values[rows], edit, self.value_pool())
+            df = Corrupt.replace_values(df, column_name, rows, corrupted_values)
+        return df
+
+    def take(self, positions):
+        """ Function that returns the rows at the given positions, in the given order and indexed by their positions. Only those rows are generated,
+        corrupted and validated."""
+        positions = np.asarray(positions, dtype='int64')
+        if len(positions) and (positions.min() < 0 or positions.max() >= self.size):
+            raise IndexError(f"Row positions must be from 0 up to {self.size - 1}.")
+        df = self.clean_rows(positions)
+        if self.corrupted():
+            df = self.corrupt_rows(df)
+        if self.validated:
+            df = Validate.validate(df, today=self.as_of)
+        return Compact.compact(df) if self.compact else df
+
+    def rows(self, start, stop):
+        """ Function that returns the rows from start up to but not including stop."""
+        start, stop = max(start, 0), min(stop, self.size)
+        return self.take(np.arange(start, max(start, stop)))
+
+    def page(self, number):
+        """ Function that returns one page of page_size rows, the last one possibly shorter."""
+        return self.rows(number * self.page_size, (number + 1) * self.page_size)
+
+    def iter_pages(self, start=0, stop=None):
+        """ Function to go through the pages from start up to but not including stop, by default to the end of the dataset."""
+        stop = -(-self.size // self.page_size) if stop is None else stop
+        for number in range(start, stop):
+            yield self.page(number)
+
+    def sample(self, num_rows, rng=None):
+        """ Function that returns num_rows different rows picked at random, in order of position."""
+        rng = np.random.default_rng() if rng is None else rng
+        return self.take(np.sort(rng.choice(self.size, size=min(num_rows, self.size), replace=False)))
 
+    def __getitem__(self, key):
+        """ Function that returns a row as a series for a position, or the rows of a slice as a dataframe."""
+        if isinstance(key, slice):
+            return self.take(np.asarray(range(self.size)[key], dtype='int64'))
+        position = key + self.size if key < 0 else key
+        return self.take([position]).iloc[0]
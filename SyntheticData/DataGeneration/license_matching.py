@@ -0,0 +1,271 @@
+# All required modules and initialisations.
+import numpy as np
+import pandas as pd
+from license_data_generator import Validate
+
+class Matcher:
+    """This is a class to match corrupted license records back to the clean records they came from, for testing record linkage. Instead of comparing every pair,
+candidates are picked by blocking keys that survive the corruptions of the Corrupt class, and only those candidates are scored with string distances
+computed for all pairs at once. The blocking index of the clean dataset is built once and can be reused for any number of corrupted datasets."""
+    # Pieces of the driver number used as blocking keys, each together with the year of birth: the surname, the date of birth digits, and the first initial
+    # with the random letters. Up to 3 edits can only break every piece if they land in all of them, and deletions move later pieces up to 3 characters left.
+    DRIVER_NUM_SEGMENTS = ((0, 5), (5, 11), (11, 16))
+    MAX_EDITS = 3
+
+    # Columns compared when scoring a candidate, and how they are compared. Corrupt only replaces characters of names in place, so they are compared
+    # character by character, while it adds and deletes characters of driver numbers, so they are compared by edit distance.
+    FIELDS = {'First Name': 'characters', 'Last Name': 'characters', 'Date of Birth': 'date', 'Place of Birth': 'characters', 'Gender': 'exact',
+              'Date of Issue': 'date', 'Date of Expiry': 'date', 'License Number': 'edits', 'Address': 'prefix'}
+
+    def __init__(self, clean_df, max_block_size=25, chunk_size=100000):
+        """ Function to build the blocking index of a clean dataset from License. Keys shared by more than max_block_size clean records are too common to narrow
+        the search and are left out, which keeps the number of candidates per record bounded. Candidates are scored chunk_size pairs at a time."""
+        self.clean = clean_df
+        self.max_block_size = max_block_size
+        self.chunk_size = chunk_size
+
+        # Group the clean positions by key code, so the positions with one key are a contiguous slice of self.positions.
+        dates = {}
+        positions, keys = Matcher.blocking_keys(clean_df, False, dates)
+        codes, self.keys = pd.factorize(keys)
+        self.block_sizes = np.bincount(codes, minlength=len(self.keys))
+        self.keys = pd.Index(self.keys)
+        order = np.argsort(codes, kind='stable')
+        self.positions = positions[order]
+        self.block_starts = np.concatenate([[0], np.cumsum(self.block_sizes)[:-1]]).astype('int64')
+        self.clean_fields = Matcher.fields(clean_df, dates)
+
+    @staticmethod
+    def text(values):
+        """ Function that returns a column as a series of plain strings, with missing values as empty strings, so compact columns are handled too."""
+        return pd.Series(np.asarray(values, dtype=object), dtype=object).fillna('').astype(str)
+
+    @staticmethod
+    def date_key(df, column_name, dates=None):
+        """ Function that returns a date column as integers made of the year and the smaller and larger of the day and month, with -1 where the date can't be read,
+        so dates written with '/' or with the day and month swapped get the same key. Impossible dates from Corrupt keep their year but get a day and month
+        that no clean date has. If a dates dictionary is given, each column is worked out only once and shared, like Validate.date_days."""
+        if dates is not None and column_name in dates:
+            return dates[column_name]
+
+        def keys(uniques):
+            # Read the digits of 'dd.mm.yyyy' dates straight from the character codes, which covers every date Corrupt writes.
+            codes, lengths = Matcher.codes(uniques.fillna('').astype(str))
+            codes = np.pad(codes, ((0, 0), (0, max(10 - codes.shape[1], 0))))[:, :10].astype('int64')
+            digits = codes[:, [0, 1, 3, 4, 6, 7, 8, 9]] - ord('0')
+            separators = np.isin(codes[:, [2, 5]], [ord('.'), ord('/')]).all(axis=1)
+            valid = (lengths == 10) & separators & ((digits >= 0) & (digits <= 9)).all(axis=1)
+            day, month = digits[:, 0] * 10 + digits[:, 1], digits[:, 2] * 10 + digits[:, 3]
+            year = digits[:, 4:] @ np.array([1000, 100, 10, 1])
+            return np.where(valid, year * 10000 + np.minimum(day, month) * 100 + np.maximum(day, month), -1)
+        key = Validate.per_value(df[column_name], keys)
+        if dates is not None:
+            dates[column_name] = key
+        return key
+
+    @staticmethod
+    def year(keys):
+        """ Function that returns the years of keys from Matcher.date_key, which every date corruption leaves in place, with -1 where the date can't be read."""
+        return np.where(keys >= 0, keys // 10000, -1)
+
+    @staticmethod
+    def key(name, *parts):
+        """ Function that combines the parts of a blocking key, each an array of numbers or strings, into one 64-bit hash per row. The hash is salted with
+        the name of the key, so different kinds of key never share a block."""
+        hashes = np.full(len(parts[0]), pd.util.hash_array(np.array([name], dtype=object))[0], dtype='uint64')
+        for part in parts:
+            hashes = pd.util.hash_array(hashes ^ pd.util.hash_array(np.asarray(part), categorize=False), categorize=False)
+        return hashes
+
+    @staticmethod
+    def driver_num_keys(numbers, years, corrupted):
+        """ Function that returns the blocking keys of driver numbers as (row, key) arrays, one key per piece in Matcher.DRIVER_NUM_SEGMENTS with the year.
+        For corrupted numbers each piece is also taken up to Matcher.MAX_EDITS characters further left, in case characters before it were deleted."""
+        codes, lengths = Matcher.codes(Matcher.text(numbers))
+        rows, keys = [], []
+        for segment, (start, stop) in enumerate(Matcher.DRIVER_NUM_SEGMENTS):
+            for shift in range(min(start, Matcher.MAX_EDITS) + 1 if corrupted else 1):
+                valid = np.flatnonzero(lengths >= stop - shift)
+                if len(valid) == 0:
+                    continue
+                # Read the piece of every number straight from the character codes, as a fixed width string.
+                pieces = np.ascontiguousarray(codes[valid, start - shift:stop - shift]).view(f'U{stop - start}').ravel().astype(object)
+                rows.append(valid)
+                keys.append(Matcher.key(f'number{segment}', pieces, years[valid]))
+        return rows, keys
+
+    @staticmethod
+    def blocking_keys(df, corrupted, dates=None):
+        """ Function that returns every blocking key of every record as two arrays, the row positions and the keys. Records sharing a key become candidates.
+        The date keys pair a date that survives a swapped day and month with the year of another date, since every date corruption leaves the year in place.
+        The driver number keys survive up to 3 edits, and the address key is the house number and street, which survives all but the shortest truncation."""
+        dob, issue, expiry = (Matcher.date_key(df, column, dates) for column in ('Date of Birth', 'Date of Issue', 'Date of Expiry'))
+        dob_year, issue_year = Matcher.year(dob), Matcher.year(issue)
+        street = Matcher.text(df['Address']).str.split(', ', n=1).str[0].to_numpy(dtype=object)
+        passes = [('birth', dob >= 0, (dob, issue_year)),
+                  ('issue', issue >= 0, (issue, dob_year)),
+                  ('expiry', expiry >= 0, (expiry, dob_year)),
+                  ('street', street != '', (street,))]
+
+        rows, keys = Matcher.driver_num_keys(df['License Number'], dob_year, corrupted)
+        for name, valid, parts in passes:
+            valid = np.flatnonzero(valid)
+            rows.append(valid)
+            keys.append(Matcher.key(name, *[part[valid] for part in parts]))
+        return np.concatenate(rows).astype('int64'), np.concatenate(keys)
+
+    def candidates(self, corrupted_df, dates=None):
+        """ Function that returns the candidate pairs for a corrupted dataset as two arrays, the positions of the corrupted records and of the clean records.
+        Every pair appears once, and the pairs are sorted by corrupted record. A dates dictionary is passed on to Matcher.date_key."""
+        rows, keys = Matcher.blocking_keys(corrupted_df, True, dates)
+        codes = self.keys.get_indexer(keys)
+        found = codes >= 0
+        rows, codes = rows[found], codes[found]
+        found = self.block_sizes[codes] <= self.max_block_size
+        rows, codes = rows[found], codes[found]
+
+        # Pair every corrupted record with each clean record in the blocks of its keys, without looping over the blocks.
+        sizes = self.block_sizes[codes]
+        pair_rows = np.repeat(rows, sizes)
+        offsets = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        pair_candidates = self.positions[np.repeat(self.block_starts[codes], sizes) + offsets]
+
+        # Drop pairs found by more than one key.
+        pairs = np.unique(pair_rows * len(self.clean) + pair_candidates)
+        return pairs // len(self.clean), pairs % len(self.clean)
+
+    @staticmethod
+    def fields(df, dates=None):
+        """ Function that prepares the columns of a dataset that are compared when scoring: text columns as an id per row for its distinct value, with the
+        character codes and lengths of the distinct values, dates as keys from Matcher.date_key with their years, and the other columns as plain strings.
+        A dates dictionary is passed on to Matcher.date_key."""
+        fields = {}
+        for column, kind in Matcher.FIELDS.items():
+            if kind in ('characters', 'edits', 'prefix'):
+                ids, uniques = pd.factorize(Matcher.text(df[column]))
+                fields[column] = (ids, *Matcher.codes(uniques))
+            elif kind == 'date':
+                key = Matcher.date_key(df, column, dates)
+                fields[column] = (key, Matcher.year(key))
+            else:
+                fields[column] = Matcher.text(df[column]).to_numpy(dtype=str)
+        return fields
+
+    @staticmethod
+    def codes(values):
+        """ Function that turns strings into a 2D array of character codes, one row per string padded with zeros, and an array of their lengths."""
+        values = np.asarray(values, dtype=str)
+        width = max(values.dtype.itemsize // 4, 1)
+        return values.astype(f'U{width}').view(np.uint32).reshape(len(values), width), np.char.str_len(values)
+
+    @staticmethod
+    def levenshtein(a, a_lengths, b, b_lengths):
+        """ Function that returns the edit distances between pairs of strings given as arrays of character codes from Matcher.codes, for all pairs at once.
+        Each cell of the distance table is worked out for every pair together, one row of the table at a time."""
+        # Work with one column per pair, so every step runs over all the pairs at once.
+        a, b = np.ascontiguousarray(a.T), np.ascontiguousarray(b.T)
+        previous = np.broadcast_to(np.arange(len(b) + 1, dtype='int16')[:, None], (len(b) + 1, len(a_lengths))).copy()
+        current = np.empty_like(previous)
+        distances = b_lengths.astype('int16')
+        for i in range(1, len(a) + 1):
+            # Best of a substitution (free if the characters match) and a deletion, then of that and an insertion after the cell before.
+            current[0] = i
+            np.minimum(previous[:-1] + (a[i - 1] != b), previous[1:] + 1, out=current[1:])
+            for j in range(1, len(current)):
+                np.minimum(current[j], current[j - 1] + 1, out=current[j])
+            done = np.flatnonzero(a_lengths == i)
+            distances[done] = current[b_lengths[done], done]
+            previous, current = current, previous
+        return distances
+
+    @staticmethod
+    def similarity(ours, theirs, rows, candidates, kind):
+        """ Function that returns how similar the text of candidate pairs is, between 0 and 1: the share of positions with the same character for 'characters',
+        one minus the edit distance for 'edits', both over the longer length, and for 'prefix' 1 if our text isn't empty and is the start of theirs.
+        Each distinct pair of values is only compared once, and only as many characters as the longest of them are compared."""
+        (our_ids, a, a_lengths), (their_ids, b, b_lengths) = ours, theirs
+        pairs, inverse = np.unique(our_ids[rows].astype('int64') * len(b) + their_ids[candidates], return_inverse=True)
+        left, right = pairs // len(b), pairs % len(b)
+        a_lengths, b_lengths = a_lengths[left], b_lengths[right]
+        a = a[left, :a_lengths.max(initial=0)]
+        b = b[right, :b_lengths.max(initial=0)]
+        if kind == 'prefix':
+            width = a.shape[1]
+            b = np.pad(b[:, :width], ((0, 0), (0, width - min(width, b.shape[1]))))
+            return (((a == b) | (a == 0)).all(axis=1) & (a_lengths > 0))[inverse]
+        longest = np.maximum(np.maximum(a_lengths, b_lengths), 1)
+        if kind == 'characters':
+            width = min(a.shape[1], b.shape[1])
+            same = ((a[:, :width] == b[:, :width]) & (a[:, :width] != 0)).sum(axis=1)
+            return (same / longest)[inverse]
+        return (1 - Matcher.levenshtein(a, a_lengths, b, b_lengths) / longest)[inverse]
+
+    def score(self, corrupted_fields, rows, candidates):
+        """ Function that scores candidate pairs by adding up how similar each compared column is, between 0 and 1. Text columns score as Matcher.similarity,
+        dates score 1 if they match up to a swapped day and month and 0.5 if only the year matches, the gender has to be equal,
+        and the address scores 1 if the corrupted address is the start of the clean one."""
+        scores = np.zeros(len(rows))
+        for column, kind in Matcher.FIELDS.items():
+            ours, theirs = corrupted_fields[column], self.clean_fields[column]
+            if kind in ('characters', 'edits', 'prefix'):
+                scores += Matcher.similarity(ours, theirs, rows, candidates, kind)
+            elif kind == 'date':
+                same_key = (ours[0][rows] == theirs[0][candidates]) & (ours[0][rows] >= 0)
+                same_year = (ours[1][rows] == theirs[1][candidates]) & (ours[1][rows] >= 0)
+                scores += np.where(same_key, 1.0, np.where(same_year, 0.5, 0.0))
+            else:
+                scores += ours[rows] == theirs[candidates]
+        return scores
+
+    def pairs(self, corrupted_df):
+        """ Function that returns every candidate pair of a corrupted dataset with its score, as arrays of corrupted positions, clean positions and scores."""
+        dates = {}
+        rows, candidates = self.candidates(corrupted_df, dates)
+        corrupted_fields = Matcher.fields(corrupted_df, dates)
+        scores = np.concatenate([self.score(corrupted_fields, rows[start:start + self.chunk_size], candidates[start:start + self.chunk_size])
+                                 for start in range(0, len(rows), self.chunk_size)] or [np.empty(0)])
+        return rows, candidates, scores
+
+    @staticmethod
+    def best(num_rows, rows, candidates, scores):
+        """ Function that picks the highest scoring candidate of every corrupted record, returning their positions (-1 for records without candidates),
+        their scores and the number of candidates of each record."""
+        order = np.lexsort((-scores, rows))
+        first = np.unique(rows[order], return_index=True)[1]
+        matches = np.full(num_rows, -1, dtype='int64')
+        best_scores = np.full(num_rows, np.nan)
+        matches[rows[order][first]] = candidates[order][first]
+        best_scores[rows[order][first]] = scores[order][first]
+        return matches, best_scores, np.bincount(rows, minlength=num_rows)
+
+    def match(self, corrupted_df):
+        """ Function that returns a dataframe with the best match for every corrupted record: the index of the clean record, its score out of the number
+        of compared columns, and how many candidates were scored. Records without any candidate have a missing match."""
+        matches, scores, counts = Matcher.best(len(corrupted_df), *self.pairs(corrupted_df))
+        labels = pd.Series(self.clean.index, dtype=object).reindex(matches).to_numpy(dtype=object)
+        return pd.DataFrame({'Match': labels, 'Score': scores, 'Candidates': counts}, index=corrupted_df.index)
+
+    def report(self, corrupted_df, truth=None, log=None):
+        """ Function that matches a corrupted dataset and measures it against the ground truth, which is the index label of the clean source of each
+        corrupted record and defaults to the corrupted dataset's own index, as Corrupt keeps the rows in place. Returns a dataframe with the pair completeness
+        (the share of records whose source is a candidate) and the recall (the share matched to their source) for all records, and, if a CorruptionLog of
+        the corruption is given, for the records corrupted in each column."""
+        rows, candidates, scores = self.pairs(corrupted_df)
+        matches, _, counts = Matcher.best(len(corrupted_df), rows, candidates, scores)
+        sources = self.clean.index.get_indexer(corrupted_df.index if truth is None else truth)
+        has_source = np.isin(np.arange(len(corrupted_df)) * len(self.clean) + sources, rows * len(self.clean) + candidates) & (sources >= 0)
+        correct = (matches == sources) & (sources >= 0)
+
+        groups = {'All': np.ones(len(corrupted_df), dtype=bool)}
+        if log is not None:
+            groups.update({column: log.mask(column, len(corrupted_df)) for column in log.columns})
+        report = {}
+        for name, mask in groups.items():
+            total = int(mask.sum())
+            report[name] = {
+                'Rows': total,
+                'Candidates per Row': counts[mask].mean() if total else 0.0,
+                'Pair Completeness': has_source[mask].mean() if total else 1.0,
+                'Recall': correct[mask].mean() if total else 1.0
+            }
+        return pd.DataFrame.from_dict(report, orient='index')
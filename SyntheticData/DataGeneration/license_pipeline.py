@@ -0,0 +1,246 @@
+# All required modules and initialisations.
+import argparse
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+import numpy as np
+from license_data_generator import ValuePool, DriverNumberRegistry, License, Corrupt, Validate, Stats, StatsSummary
+from license_profiling import Profiler
+
+logger = logging.getLogger('license_pipeline')
+
+# Settings of a scenario that aren't given in its config file.
+DEFAULT_SCENARIO = {
+    'dataset': 'license_data',
+    'rows': 100000,
+    'batch_size': 100000,
+    'corruption_level': 0.1,
+    'column_corruption': {},
+    'seed': None,
+    'pool_size': 10000,
+    'locale': 'en_GB',
+    'compact': True,
+    'unique_driver_numbers': False,
+    'queue_size': 2,
+    'sink': {'type': 'none'}
+}
+
+# Marker put on a queue after the last batch.
+DONE = object()
+
+def load_scenario(path=None, **overrides):
+    """ Function to read a scenario from a JSON config file, filling in the defaults and applying any overrides that aren't None."""
+    scenario = dict(DEFAULT_SCENARIO)
+    if path is not None:
+        with open(path, encoding='utf-8') as file:
+            scenario.update(json.load(file))
+    scenario.update({key: value for key, value in overrides.items() if value is not None})
+
+    # Check the scenario up front, so a bad config fails before any work is done.
+    unknown = set(scenario) - set(DEFAULT_SCENARIO)
+    if unknown:
+        raise ValueError(f"Unknown scenario settings {sorted(unknown)}.")
+    attributes = License.generate_dataset(0).columns
+    unknown = set(scenario['column_corruption']) - set(attributes)
+    if unknown:
+        raise ValueError(f"Unknown columns {sorted(unknown)} in column_corruption, expected some of {list(attributes)}.")
+    if scenario['rows'] < 0 or scenario['batch_size'] < 1 or scenario['queue_size'] < 1:
+        raise ValueError("rows must be at least 0, and batch_size and queue_size at least 1.")
+    if scenario['sink'].get('type') not in Sink.TYPES:
+        raise ValueError(f"Unknown sink '{scenario['sink'].get('type')}', expected one of {Sink.TYPES}.")
+    if scenario['sink']['type'] in Sink.PATH_TYPES and not scenario['sink'].get('path'):
+        raise ValueError(f"The {scenario['sink']['type']} sink needs a path, set 'path' in the sink config or pass --output.")
+    return scenario
+
+class Sink:
+    """This is a class to write the validated batches of a pipeline to where they are kept: Parquet or Arrow IPC files, a SQLite or MySQL database,
+or nowhere at all for dry runs and benchmarks."""
+    TYPES = ['none', 'parquet', 'ipc', 'sqlite', 'mysql']
+    # Sinks that write to a file or directory, and so need a path.
+    PATH_TYPES = ['parquet', 'ipc', 'sqlite']
+
+    def __init__(self, config, dataset):
+        """ Function to open the sink described by a scenario's sink config."""
+        self.type = config['type']
+        self.dataset = dataset
+        self.writer = None
+        self.exporter = None
+        if self.type in ('parquet', 'ipc'):
+            from license_data_files import ColumnarWriter
+            self.writer = ColumnarWriter(config['path'], format=self.type, compression=config.get('compression', 'zstd'),
+                                         partition_by_dataset=config.get('partition_by_dataset', False))
+        elif self.type in ('sqlite', 'mysql'):
+            from license_data_export import Exporter
+            options = {key: value for key, value in config.items() if key not in ('type', 'path')}
+            self.exporter = Exporter.for_sqlite(config['path'], **options) if self.type == 'sqlite' else Exporter.for_mysql(**options)
+
+    def write(self, batch):
+        """ Function to write one validated batch."""
+        if self.writer is not None:
+            self.writer.write(batch, dataset=self.dataset if self.writer.partition_by_dataset else None)
+        elif self.exporter is not None:
+            self.exporter.load(batch, self.dataset)
+
+    def close(self, summary=None, metadata=None):
+        """ Function to finish writing, and to record the dataset in the registry if the sink is a database and a summary is given."""
+        if self.writer is not None:
+            self.writer.close()
+        elif self.exporter is not None:
+            if summary is not None:
+                self.exporter.register(self.dataset, summary, metadata)
+            self.exporter.close()
+
+class Pipeline:
+    """This is a class to run a scenario as four stages - generate, corrupt, validate and write - each in its own thread and linked by bounded queues.
+While one batch is being written the next ones are being validated, corrupted and generated, so the run takes about as long as its slowest stage,
+and the queues hold at most queue_size batches between two stages, so memory stays flat however many rows are generated."""
+    def __init__(self, scenario):
+        """ Function to set up a pipeline for a scenario from load_scenario."""
+        self.scenario = scenario
+        self.stop = threading.Event()
+        self.errors = []
+        self.busy = {}
+        self.summary = StatsSummary()
+
+        # Every stage draws from its own generator, so a seeded scenario gives the same data however the threads interleave.
+        generate_seed, corrupt_seed = np.random.SeedSequence(scenario['seed']).spawn(2)
+        self.generate_rng = np.random.default_rng(generate_seed)
+        self.corrupt_rng = np.random.default_rng(corrupt_seed)
+        self.pool = None
+        if scenario['pool_size']:
+            self.pool = ValuePool(scenario['locale'], scenario['pool_size'], seed=scenario['seed'])
+        self.registry = DriverNumberRegistry() if scenario['unique_driver_numbers'] else None
+
+    def put(self, out_queue, item):
+        """ Function to put an item on a queue, giving up if another stage has failed so no thread waits forever."""
+        while not self.stop.is_set():
+            try:
+                out_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def get(self, in_queue):
+        """ Function to take the next item from a queue, returning DONE if another stage has failed."""
+        while not self.stop.is_set():
+            try:
+                return in_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return DONE
+
+    def run_stage(self, name, work, in_queue, out_queue):
+        """ Function that runs one stage: it applies work to every batch from in_queue and puts the results on out_queue.
+        The first stage has no in_queue and work yields its batches instead."""
+        self.busy[name] = 0.0
+        try:
+            if in_queue is None:
+                batches = work()
+                while True:
+                    start = time.perf_counter()
+                    batch = next(batches, DONE)
+                    self.busy[name] += time.perf_counter() - start
+                    if batch is DONE or not self.put(out_queue, batch):
+                        break
+            else:
+                while True:
+                    batch = self.get(in_queue)
+                    if batch is DONE:
+                        break
+                    start = time.perf_counter()
+                    batch = work(batch)
+                    self.busy[name] += time.perf_counter() - start
+                    if out_queue is not None and not self.put(out_queue, batch):
+                        break
+        except BaseException as error:
+            # Stop every other stage, and keep the error to raise from run().
+            logger.exception("Stage '%s' failed.", name)
+            self.errors.append(error)
+            self.stop.set()
+        finally:
+            if out_queue is not None:
+                self.put(out_queue, DONE)
+
+    def generate(self):
+        """ Function for the generate stage, yielding the batches of the scenario."""
+        return License.iter_batches(self.scenario['rows'], self.scenario['batch_size'], self.generate_rng, self.pool, self.scenario['compact'], self.registry)
+
+    def corrupt(self, batch):
+        """ Function for the corrupt stage."""
+        return Corrupt.introduce_corruptions(batch, self.scenario['corruption_level'], self.pool, self.corrupt_rng, self.scenario['column_corruption'])
+
+    def write(self, batch):
+        """ Function for the sink stage, which writes a batch and adds it to the summary of the dataset."""
+        self.sink.write(batch)
+        self.summary = self.summary + Stats.summarise(batch)
+        logger.info("Wrote %d of %d rows.", self.summary.total_rows, self.scenario['rows'])
+
+    def run(self):
+        """ Function that runs the scenario to the end and returns a report of the run as a dictionary."""
+        started = time.perf_counter()
+        self.sink = Sink(self.scenario['sink'], self.scenario['dataset'])
+        queues = [queue.Queue(maxsize=self.scenario['queue_size']) for _ in range(3)]
+        stages = [('generate', self.generate, None, queues[0]),
+                  ('corrupt', self.corrupt, queues[0], queues[1]),
+                  ('validate', Validate.validate, queues[1], queues[2]),
+                  ('write', self.write, queues[2], None)]
+        threads = [threading.Thread(target=self.run_stage, args=stage, name=stage[0], daemon=True) for stage in stages]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if self.errors:
+            # Close the sink so files written so far are still readable, but leave the failed dataset out of the registry.
+            self.sink.close()
+            raise self.errors[0]
+
+        seconds = time.perf_counter() - started
+        report = {'dataset': self.scenario['dataset'],
+                  'rows': self.summary.total_rows,
+                  'corrupt_fields': self.summary.corrupt_cells,
+                  'corruption_percentage': round(float(self.summary.corrupt_percent()), 2),
+                  'seconds': round(seconds, 3),
+                  'rows_per_second': round(self.summary.total_rows / seconds, 1) if seconds else 0.0,
+                  'stage_seconds': {name: round(busy, 3) for name, busy in self.busy.items()}}
+        if self.registry is not None:
+            report['exhausted_driver_numbers'] = len(self.registry.exhausted)
+        self.sink.close(self.summary, {key: self.scenario[key] for key in ('rows', 'corruption_level', 'column_corruption', 'seed')})
+        return report
+
+def main(argv=None):
+    """ Function for the command line, which runs a scenario and prints its report as a line of JSON. Settings given on the command line override the config file."""
+    parser = argparse.ArgumentParser(description="Generate, corrupt, validate and store a synthetic license dataset.")
+    parser.add_argument('config', nargs='?', help="JSON scenario file")
+    parser.add_argument('--dataset', help="name of the dataset")
+    parser.add_argument('--rows', type=int, help="number of rows to generate")
+    parser.add_argument('--batch-size', type=int, help="rows per batch")
+    parser.add_argument('--corruption-level', type=float, help="corruption level for every column")
+    parser.add_argument('--seed', type=int, help="seed for reproducible datasets")
+    parser.add_argument('--sink', help=f"where to write the dataset, one of {Sink.TYPES}")
+    parser.add_argument('--output', help="file, directory or database path of the sink")
+    parser.add_argument('--profile', help="record the time, rows and cells of every function and save them as JSON to this file")
+    parser.add_argument('--quiet', action='store_true', help="only log warnings and errors")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO, format="%(asctime)s %(levelname)s %(threadName)s %(message)s")
+    sink = None
+    if args.sink is not None or args.output is not None:
+        sink = dict(load_scenario(args.config)['sink'])
+        sink.update({key: value for key, value in (('type', args.sink), ('path', args.output)) if value is not None})
+    scenario = load_scenario(args.config, dataset=args.dataset, rows=args.rows, batch_size=args.batch_size,
+                             corruption_level=args.corruption_level, seed=args.seed, sink=sink)
+
+    if args.profile:
+        Profiler.enable()
+    report = Pipeline(scenario).run()
+    if args.profile:
+        Profiler.to_json(args.profile)
+    print(json.dumps(report))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,145 @@
+# All required modules and initialisations.
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+
+class Profiler:
+    """This is a class to record how long the functions of License, Corrupt, Validate and Stats take, how often they are called, how many rows they
+process and how many cells they corrupt or flag. It is off unless enabled, either with Profiler.enable() or by setting the LICENSE_PROFILE environment
+variable, and while it is off every instrumented call only costs one extra check. Calls made in other processes, like the workers of
+License.generate_parallel, are not recorded."""
+    enabled = os.environ.get('LICENSE_PROFILE', '') not in ('', '0')
+    records = {}
+    lock = threading.Lock()
+    local = threading.local()
+
+    @staticmethod
+    def enable():
+        """ Function to start recording."""
+        Profiler.enabled = True
+
+    @staticmethod
+    def disable():
+        """ Function to stop recording. What has been recorded so far is kept."""
+        Profiler.enabled = False
+
+    @staticmethod
+    def reset():
+        """ Function to forget everything recorded so far."""
+        with Profiler.lock:
+            Profiler.records = {}
+
+    @staticmethod
+    def stack():
+        """ Function to return the calls of the current thread that are being recorded, innermost last."""
+        if not hasattr(Profiler.local, 'stack'):
+            Profiler.local.stack = []
+        return Profiler.local.stack
+
+    @staticmethod
+    def count(counter, amount):
+        """ Function to add to a counter, like 'cells_corrupted' or 'cells_flagged', of every call that is being recorded in the current thread,
+        so the cells are counted both for a column function and for the function that called it."""
+        if not Profiler.enabled:
+            return
+        # Entries can be shared with worker threads through Profiler.bind, so they are only updated under the lock.
+        with Profiler.lock:
+            for entry in Profiler.stack():
+                entry[counter] = entry.get(counter, 0) + amount
+
+    @staticmethod
+    def bind(function):
+        """ Function to wrap a function that is going to run on another thread, so the cells it counts are also counted for the calls of the current
+        thread that are being recorded, as they would be if it ran on this thread."""
+        parent = list(Profiler.stack())
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            saved = Profiler.stack()
+            Profiler.local.stack = list(parent)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                Profiler.local.stack = saved
+        return wrapper
+
+    @staticmethod
+    def rows(args):
+        """ Function to work out how many rows a call processes from its arguments: the length of the first dataframe, series or array argument,
+        the number of rows asked for if the first argument is a count, and otherwise a single row."""
+        for arg in args:
+            if hasattr(arg, 'shape') and hasattr(arg, '__len__'):
+                return len(arg)
+        if args and isinstance(args[0], int) and not isinstance(args[0], bool):
+            return args[0]
+        return 1
+
+    @staticmethod
+    def profile(function):
+        """ Function to wrap a function so its calls are recorded while the profiler is enabled. Calls on a column are recorded per column, as 'name[column]'."""
+        name = function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not Profiler.enabled:
+                return function(*args, **kwargs)
+
+            key = name
+            if len(args) > 1 and hasattr(args[0], 'columns') and isinstance(args[1], str):
+                key = f"{name}[{args[1]}]"
+            entry = {}
+            stack = Profiler.stack()
+            stack.append(entry)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                stack.pop()
+                with Profiler.lock:
+                    record = Profiler.records.setdefault(key, {'function': key, 'calls': 0, 'seconds': 0.0, 'rows': 0, 'cells_corrupted': 0, 'cells_flagged': 0})
+                    record['calls'] += 1
+                    record['seconds'] += seconds
+                    record['rows'] += Profiler.rows(args)
+                    for counter, amount in entry.items():
+                        record[counter] += amount
+        return wrapper
+
+    @staticmethod
+    def instrument(cls):
+        """ Function to use as a class decorator, which wraps every static method of the class with Profiler.profile.
+        Generator functions are left alone, because only creating the generator would be timed."""
+        for attribute, value in list(vars(cls).items()):
+            if isinstance(value, staticmethod) and not inspect.isgeneratorfunction(value.__func__):
+                setattr(cls, attribute, staticmethod(Profiler.profile(value.__func__)))
+        return cls
+
+    @staticmethod
+    def report():
+        """ Function to return what has been recorded as a list of dictionaries, one per function, slowest first."""
+        with Profiler.lock:
+            records = [dict(record) for record in Profiler.records.values()]
+        for record in records:
+            record['seconds'] = round(record['seconds'], 6)
+            record['rows_per_second'] = round(record['rows'] / record['seconds'], 1) if record['seconds'] else None
+        return sorted(records, key=lambda record: record['seconds'], reverse=True)
+
+    @staticmethod
+    def to_json(path=None):
+        """ Function to return the report as JSON, and write it to a file if a path is given."""
+        text = json.dumps(Profiler.report(), indent=1)
+        if path is not None:
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(text)
+        return text
+
+    @staticmethod
+    def log(logger=None, level=logging.INFO):
+        """ Function to write the report as a structured log, with one record per function whose message is JSON and whose 'profile' attribute holds the numbers."""
+        logger = logging.getLogger('license_profiling') if logger is None else logger
+        for record in Profiler.report():
+            logger.log(level, json.dumps(record), extra={'profile': record})
@@ -0,0 +1,114 @@
+# All required modules and initialisations.
+import json
+import sqlite3
+import threading
+import numpy as np
+import pytest
+import pandas as pd
+from license_data_generator import ValuePool, License, Corrupt, Validate, Stats
+from license_data_export import ConnectionPool, Exporter, TableReader
+
+class FlakyConnect:
+    """This is a class standing in for a database driver's connect function, which fails a set number of times before connecting to SQLite."""
+    def __init__(self, path, failures):
+        """ Function to set up a connect function that raises for the first failures calls."""
+        self.path = path
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise sqlite3.OperationalError("server unreachable")
+        return sqlite3.connect(self.path, check_same_thread=False)
+
+def borrow(pool, timeout=5):
+    """ Function to borrow and return a connection on another thread, failing the test instead of hanging if the pool never hands one out."""
+    outcome = {}
+
+    def run():
+        try:
+            with pool.connection() as connection:
+                outcome['value'] = connection.execute("SELECT 1").fetchone()[0]
+        except Exception as error:
+            outcome['error'] = error
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "borrowing a connection hung"
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['value']
+
+def test_pool_recovers_from_failed_connects(tmp_path):
+    """ Function to check that connects that fail don't use up the slots of the pool, and that it connects once the database is reachable again."""
+    connect = FlakyConnect(str(tmp_path / 'pool.db'), failures=3)
+    pool = ConnectionPool(connect, size=2)
+    for _ in range(3):
+        with pytest.raises(sqlite3.OperationalError):
+            borrow(pool)
+    assert borrow(pool) == 1
+    assert borrow(pool) == 1
+    assert pool.opened <= 2
+    pool.close()
+
+def test_pool_discards_connection_after_error(tmp_path):
+    """ Function to check that a block that raises has its uncommitted rows rolled back rather than committed by the next borrower."""
+    path = str(tmp_path / 'pool.db')
+    pool = ConnectionPool(lambda: sqlite3.connect(path, check_same_thread=False), size=1)
+    with pool.connection() as connection:
+        connection.execute("CREATE TABLE numbers (value INTEGER)")
+        connection.commit()
+    with pytest.raises(RuntimeError):
+        with pool.connection() as connection:
+            connection.execute("INSERT INTO numbers VALUES (1)")
+            raise RuntimeError("failed part way")
+    with pool.connection() as connection:
+        connection.commit()
+        assert connection.execute("SELECT COUNT(*) FROM numbers").fetchone()[0] == 0
+    pool.close()
+
+@pytest.mark.parametrize('method', ['bogus', 'load_data'])
+def test_load_checks_method_first(tmp_path, method):
+    """ Function to check that an unknown method, or LOAD DATA on SQLite, is refused before any connection is opened."""
+    exporter = Exporter.for_sqlite(str(tmp_path / 'license_data.db'))
+    with pytest.raises(ValueError):
+        exporter.load(pd.DataFrame({'First Name': ['Anne']}), 'dataset', method=method)
+    assert exporter.pool.opened == 0
+
+def test_round_trip_through_sqlite(tmp_path):
+    """ Function to check a whole round trip on a SQLite file: the schema is created, two datasets are loaded and registered, read back in chunks
+    ordered by id, and the registry is updated from the table with the same 0/1 flags that register wrote."""
+    pool = ValuePool(size=200, seed=3)
+    rng = np.random.default_rng(3)
+    datasets = {'normal_dataset': Validate.validate(License.generate_dataset(25, rng=rng, pool=pool)),
+                'some_corrupt_dataset': Validate.validate(Corrupt.introduce_corruptions(License.generate_dataset(30, rng=rng, pool=pool), 0.3, pool, rng))}
+    exporter = Exporter.for_sqlite(str(tmp_path / 'license_data.db'))
+    exporter.create_schema()
+    for name, dataset in datasets.items():
+        assert exporter.load(dataset, name) == len(dataset)
+    exporter.register('normal_dataset', datasets['normal_dataset'], metadata={'description': 'clean'})
+
+    # Chunks are read after the last id of the one before, so they cover the table once, in order, whatever the chunk size.
+    reader = TableReader(exporter, chunk_size=7)
+    chunks = list(reader.iter_chunks())
+    assert all(len(chunk) <= 7 for chunk in chunks)
+    table = pd.concat(chunks)
+    assert table.index.is_monotonic_increasing and table.index.is_unique
+    expected = pd.concat([dataset.assign(Dataset=name) for name, dataset in datasets.items()]).astype(str)
+    pd.testing.assert_frame_equal(table.reset_index(drop=True), expected.reset_index(drop=True), check_dtype=False)
+    assert len(pd.concat(reader.iter_chunks('some_corrupt_dataset'))) == len(datasets['some_corrupt_dataset'])
+
+    # The registered dataset is updated in place and the other is registered as new, both with the numbers register writes.
+    summaries = reader.summarise()
+    reader.update_registry(summaries)
+    with exporter.pool.connection() as connection:
+        registry = pd.read_sql_query("SELECT * FROM dataset_registry ORDER BY dataset_id", connection)
+    assert list(registry['Dataset']) == list(datasets)
+    for (_, row), (name, dataset) in zip(registry.iterrows(), datasets.items()):
+        expected = Stats.summarise(dataset).registry_row(name)
+        assert {column: row[column] for column in expected if column != 'Corruption_Percentage'} == \
+               {column: value for column, value in expected.items() if column != 'Corruption_Percentage'}
+        assert row['Corruption_Percentage'] == pytest.approx(float(expected['Corruption_Percentage']))
+    assert json.loads(registry['Metadata'][0]) == {'description': 'clean'}
+    exporter.close()
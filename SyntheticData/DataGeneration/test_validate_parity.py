@@ -0,0 +1,208 @@
+# All required modules and initialisations.
+import random
+import re
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import pytest
+from license_data_generator import ValuePool, License, Corrupt, Validate
+
+class IterrowsValidate:
+    """This is a class holding the row by row validators that Validate replaced, kept unchanged apart from sharing the code that inserts the
+status column, so the flags of the vectorised validators can be checked against them."""
+    @staticmethod
+    def insert_status(df, column_name):
+        """ Function that inserts an all 0 corruption status column next to a column and returns its name."""
+        new_column_name = f"{column_name} Corruption"
+        df.insert(df.columns.get_loc(column_name) + 1, new_column_name, 0)
+        return new_column_name
+
+    @staticmethod
+    def validate_name(df, column_name):
+        """ Function that validates a name column one row at a time."""
+        new_column_name = IterrowsValidate.insert_status(df, column_name)
+        pattern = re.compile(r'^[a-zA-Z]+$')
+        for index, row in df.iterrows():
+            name = str(row[column_name])
+            if not name or not pattern.match(name):
+                df.at[index, new_column_name] = 1
+        return df
+
+    @staticmethod
+    def validate_birthdate(df, column_name):
+        """ Function that validates the date of birth column one row at a time."""
+        new_column_name = IterrowsValidate.insert_status(df, column_name)
+        earliest_dob = datetime(1950, 1, 1)
+        latest_dob = datetime.today() - timedelta(days=17 * 365)
+        for index, row in df.iterrows():
+            try:
+                dob = datetime.strptime(str(row[column_name]), '%d.%m.%Y')
+                if not earliest_dob <= dob <= latest_dob:
+                    df.at[index, new_column_name] = 1
+            except ValueError:
+                df.at[index, new_column_name] = 1
+        return df
+
+    @staticmethod
+    def validate_birthplace(df, column_name):
+        """ Function that validates the place of birth column one row at a time."""
+        new_column_name = IterrowsValidate.insert_status(df, column_name)
+        pattern = re.compile(r'^[a-zA-Z\s]+$')
+        for index, row in df.iterrows():
+            birthplace = str(row[column_name])
+            if not birthplace or not pattern.match(birthplace):
+                df.at[index, new_column_name] = 1
+        return df
+
+    @staticmethod
+    def validate_gender(df, column_name):
+        """ Function that validates the gender column one row at a time."""
+        new_column_name = IterrowsValidate.insert_status(df, column_name)
+        for index, row in df.iterrows():
+            if str(row[column_name]) not in {'Male', 'Female'}:
+                df.at[index, new_column_name] = 1
+        return df
+
+    @staticmethod
+    def validate_issuedate(df, column_name, dob_column):
+        """ Function that validates the date of issue column against the date of birth one row at a time."""
+        new_column_name = IterrowsValidate.insert_status(df, column_name)
+        for index, row in df.iterrows():
+            try:
+                dob = datetime.strptime(row[dob_column], '%d.%m.%Y')
+                date_of_issue = datetime.strptime(str(row[column_name]), '%d.%m.%Y')
+                if not (dob + timedelta(days=17*365) <= date_of_issue <= datetime.today()):
+                    df.at[index, new_column_name] = 1
+            except (ValueError, KeyError):
+                df.at[index, new_column_name] = 1
+        return df
+
+    @staticmethod
+    def validate_expirydate(df, column_name, issue_column):
+        """ Function that validates the date of expiry column against the date of issue one row at a time."""
+        new_column_name = IterrowsValidate.insert_status(df, column_name)
+        for index, row in df.iterrows():
+            try:
+                date_of_issue = datetime.strptime(row[issue_column], '%d.%m.%Y')
+                date_of_expiry = datetime.strptime(str(row[column_name]), '%d.%m.%Y')
+                if date_of_expiry != date_of_issue + timedelta(days=10*365):
+                    df.at[index, new_column_name] = 1
+            except (ValueError, KeyError):
+                df.at[index, new_column_name] = 1
+        return df
+
+    @staticmethod
+    def validate_authority(df, column_name):
+        """ Function that validates the issuing authority column one row at a time."""
+        new_column_name = IterrowsValidate.insert_status(df, column_name)
+        for index, row in df.iterrows():
+            if str(row[column_name]) != "DA1":
+                df.at[index, new_column_name] = 1
+        return df
+
+    @staticmethod
+    def validate_drivernum(df, column_name, first_name, last_name, gender, date_of_birth):
+        """ Function that validates the license number column against the columns it is built from one row at a time."""
+        def generate_expected_driver_num(first_name, last_name, gender, date_of_birth):
+            l_name = last_name.upper().replace("MAC", "MC").ljust(5, '9')[:5]
+            month_digit = str(int(date_of_birth[3:5])).zfill(2)
+            if gender.lower() == 'female':
+                month_digit = str(int(month_digit) + 50).zfill(2)
+            random_letters = ''.join(random.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZ', k=2))
+            return f'{l_name}{date_of_birth[8]}{month_digit}{date_of_birth[:2].zfill(2)}{date_of_birth[9]}{first_name[0].upper()}99{random_letters}'
+
+        new_column_name = IterrowsValidate.insert_status(df, column_name)
+        letters_pattern = re.compile(r'^[A-Z]+$')
+        for index, row in df.iterrows():
+            expected_driver_num = generate_expected_driver_num(row[first_name], row[last_name], row[gender], row[date_of_birth])
+            driver_num = str(row[column_name])
+            if driver_num[:14] != expected_driver_num[:14] or not letters_pattern.match(driver_num[14:]):
+                df.at[index, new_column_name] = 1
+        return df
+
+    @staticmethod
+    def validate_address(df, column_name):
+        """ Function that validates the address column one row at a time."""
+        new_column_name = IterrowsValidate.insert_status(df, column_name)
+        street_pattern = re.compile(r'^\d{1,3}\s[A-Za-z]+\s[A-Za-z]+$')
+        city_pattern = re.compile(r'^[A-Za-z]+(?:\s[A-Za-z]+)?$')
+        postcode_pattern = re.compile(r'^[A-Za-z]{1,2}\d[A-Za-z0-9]?\s\d[A-Za-z]{2}$')
+        for index, row in df.iterrows():
+            address = str(row[column_name])
+            address_components = address.split(', ') if address else []
+            if len(address_components) != 3:
+                df.at[index, new_column_name] = 1
+                continue
+            street_address, city, postcode = address_components
+            if not street_pattern.match(street_address) or not city_pattern.match(city) or not postcode_pattern.match(postcode):
+                df.at[index, new_column_name] = 1
+        return df
+
+    @staticmethod
+    def validate(df):
+        """ Function that calls every row by row validator in the same order as Validate.validate."""
+        df = IterrowsValidate.validate_name(df, 'First Name')
+        df = IterrowsValidate.validate_name(df, 'Last Name')
+        df = IterrowsValidate.validate_birthdate(df, 'Date of Birth')
+        df = IterrowsValidate.validate_birthplace(df, 'Place of Birth')
+        df = IterrowsValidate.validate_gender(df, 'Gender')
+        df = IterrowsValidate.validate_issuedate(df, 'Date of Issue', 'Date of Birth')
+        df = IterrowsValidate.validate_expirydate(df, 'Date of Expiry', 'Date of Issue')
+        df = IterrowsValidate.validate_authority(df, 'Issuing Authority')
+        df = IterrowsValidate.validate_drivernum(df, 'License Number', 'First Name', 'Last Name', 'Gender', 'Date of Birth')
+        df = IterrowsValidate.validate_address(df, "Address")
+        return df
+
+@pytest.fixture(scope='module')
+def pool():
+    """ Function to build one small seeded pool for every test, so the datasets are the same on every run."""
+    return ValuePool(size=500, seed=11)
+
+@pytest.mark.parametrize('corruption_level', [0, 0.1, 0.5, 1])
+def test_validate_matches_iterrows(pool, corruption_level):
+    """ Function to check that every status column of Validate.validate matches the row by row validators on a seeded dataset."""
+    rng = np.random.default_rng(int(corruption_level * 100))
+    dataset = Corrupt.introduce_corruptions(License.generate_dataset(1000, rng=rng, pool=pool), corruption_level, pool, rng)
+    pd.testing.assert_frame_equal(Validate.validate(dataset.copy()), IterrowsValidate.validate(dataset.copy()))
+
+@pytest.mark.parametrize('column_name, validator, values', [
+    ('Address', 'validate_address', ['', '1 High Street, Leeds, LS1 1AA', '1 High Street, Leeds, LS1 1AA\n', '1 High Street\n, Leeds, LS1 1AA',
+                                     '1 High Street, Leeds', '1 High Street, Leeds, LS1 1AA, UK', '1000 High Street, Leeds, LS1 1AA',
+                                     '1 High Street, Leeds , LS1 1AA']),
+    ('First Name', 'validate_name', ['', 'Anne', 'Anne\n', 'Anne-Marie', "O'Neil", 'Ann3']),
+    ('Place of Birth', 'validate_birthplace', ['', 'United Kingdom', 'United Kingdom\n', 'Côte d Ivoire', ' ']),
+    ('Gender', 'validate_gender', ['Male', 'Female', 'male', '', 'Males']),
+    ('Issuing Authority', 'validate_authority', ['DA1', 'DA1 ', 'da1', ''])
+])
+def test_text_edge_cases(column_name, validator, values):
+    """ Function to check that the text validators flag hand written edge cases, like empty addresses and trailing newlines, the same way."""
+    df = pd.DataFrame({column_name: pd.Series(values, dtype=object)})
+    new = Validate.validate_column(df.copy(), column_name)
+    old = getattr(IterrowsValidate, validator)(df.copy(), column_name)
+    pd.testing.assert_frame_equal(new, old)
+
+def test_date_edge_cases():
+    """ Function to check that the date validators handle unpadded, swapped, reformatted and impossible dates the same way."""
+    df = pd.DataFrame({
+        'Date of Birth': ['01.02.1980', '1.2.1980', '01/02/1980', '31.02.1980', '', '01.02.1949', '01.02.2090', '1.02.1980', '01.02.1980'],
+        'Date of Issue': ['01.02.2000', '1.2.2000', '01.02.2000', '01.02.2000', '01.02.2000', '01.02.2000', '01.02.2000', '01.2.2000', '2.1.2000'],
+        'Date of Expiry': ['29.01.2010', '29.1.2010', '29.01.2010', '30.01.2010', '29.01.2010', '29.01.2010', '', '29.1.2010', '29/01/2010']
+    }, dtype=object)
+    new = Validate.validate(df.copy(), ['Date of Birth', 'Date of Issue', 'Date of Expiry'])
+    old = IterrowsValidate.validate_birthdate(df.copy(), 'Date of Birth')
+    old = IterrowsValidate.validate_issuedate(old, 'Date of Issue', 'Date of Birth')
+    old = IterrowsValidate.validate_expirydate(old, 'Date of Expiry', 'Date of Issue')
+    pd.testing.assert_frame_equal(new, old)
+
+def test_drivernum_edge_cases():
+    """ Function to check the driver number validator on names with Mac, short surnames, lower case and wrong random letters."""
+    df = pd.DataFrame({
+        'First Name': ['Anne', 'Bob', 'cara', 'Dan', 'Eve'],
+        'Last Name': ['MacDonald', 'Li', 'Smith', 'Jones', 'Brown'],
+        'Gender': ['Female', 'Male', 'female', 'Male', 'Male'],
+        'Date of Birth': ['05.03.1985', '15.11.1972', '01.01.1990', '29/02/1960', '32.13.1999'],
+        'License Number': ['MCDON853055A99XY', 'LI999711152B99AB', 'SMITH951010C99Q', 'JONES602292D99ab', 'BROWN913329E99A1']
+    }, dtype=object)
+    new = Validate.validate_column(df.copy(), 'License Number')
+    old = IterrowsValidate.validate_drivernum(df.copy(), 'License Number', 'First Name', 'Last Name', 'Gender', 'Date of Birth')
+    pd.testing.assert_frame_equal(new, old)